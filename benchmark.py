@@ -0,0 +1,389 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+
+try:
+
+    import resource
+
+except ImportError: #not available on windows
+
+    resource = None
+
+#benchmark has to run without a window, so the dummy driver must be set before pygame is initialized in main
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+BASEDIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+os.chdir(BASEDIRECTORY)
+
+import pygame
+from PIL import Image
+
+import main
+
+
+DEFAULTCOUNTS = [1, 100, 1000, 10000]
+DEFAULTRESOURCES = ["jpeg", "gif"]
+DEFAULTSIZES = ["800x600", "1920x1080"]
+DEFAULTFRAMES = 200
+DEFAULTSEED = 1
+DEFAULTCONVERSIONS = ["on"]
+DEFAULTSTATICSECONDS = 1.0
+DEFAULTRENDERSCALES = [1.0]
+DEFAULTMEMORYSAVERS = 100000
+
+#python heap bytes one saver may take on top of the shared images, measured by the memory scenarios
+#animated savers own three animation states, static images are shared by all savers of a resource
+SAVERBYTESTARGETS = {"jpeg": 1024, "gif": 1536}
+
+JPEGRESOURCE = "waltuh" # real resource pack from resources directory
+GIFRESOURCE = "benchmark gif" # generated, repository has no animated pack
+
+GIFFRAMES = 24
+GIFSIZE = (480, 360)
+
+#phases of the report -> profiler marks of App.runFrame they add up
+PHASES = {
+    "events": ("events",),
+    "update": ("resourceLoading", "updateSavers"),
+    "render": ("guiDraw", "boardRender", "hud", "flip")
+}
+
+
+def generateGifResource(directory:str):
+
+    #deterministic animated pack so gif results are comparable between runs
+    os.makedirs(directory)
+
+    for name in ("idle.gif", "wallhit.gif", "cornerhit.gif"):
+
+        frames = []
+
+        for index in range(GIFFRAMES):
+
+            frame = Image.new("RGB", GIFSIZE, ((index * 10) % 256, (len(name) * 20) % 256, 128))
+            frame.paste((255, 255, 255), (index * 10, index * 5, index * 10 + 80, index * 5 + 80))
+
+            frames.append(frame)
+
+        frames[0].save(os.path.join(directory, name), save_all=True, append_images=frames[1:], duration=40, loop=0)
+
+    with open(os.path.join(directory, "context.json"), "w") as contextFile:
+
+        json.dump({
+            "resourceName": "$asDirectory",
+            "idle": "idle.gif",
+            "wallhit": "wallhit.gif",
+            "cornerhit": "cornerhit.gif",
+            "resetAnimation": True
+        }, contextFile)
+
+def prepareResources(directory:str):
+
+    shutil.copytree(os.path.join(main.RESOURCESDIRECTORY, JPEGRESOURCE), os.path.join(directory, JPEGRESOURCE))
+
+    generateGifResource(os.path.join(directory, GIFRESOURCE))
+
+def summarize(values:list[float]) -> dict:
+
+    ordered = sorted(values)
+
+    def percentile(fraction:float) -> float:
+
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    return {
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": round(percentile(0.5), 4),
+        "p95": round(percentile(0.95), 4),
+        "max": round(ordered[-1], 4)
+    }
+
+def getPeakMemory() -> int:
+
+    if resource is None: return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    #linux reports kilobytes, macos bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def measureStaticCpu(app, seconds:float, idlePowerSaving:bool) -> float:
+
+    #cpu time over wall time of the real frame loop while a focused saver stops all motion, in percent of one core
+    app.idlePowerSaving = idlePowerSaving
+
+    wallStart = time.perf_counter()
+    cpuStart = time.process_time()
+
+    while time.perf_counter() - wallStart < seconds:
+
+        app.waitForFrame()
+        app.runFrame()
+
+    return round((time.process_time() - cpuStart) / (time.perf_counter() - wallStart) * 100, 2)
+
+def createScenarioApp(scenario:dict) -> tuple:
+
+    random.seed(scenario["seed"])
+
+    main.RESOURCESDIRECTORY = scenario["resourcesDirectory"]
+    main.CONVERTIMAGES = scenario["convertImages"]
+    main.RENDERSCALE = scenario["renderScale"]
+
+    app = main.App(scenario["width"], scenario["height"])
+    app.fps = 0
+
+    #images are loaded before the first frame, otherwise frames would measure placeholders
+    app.asyncLoading = False
+
+    app.board.clearSavers()
+
+    context = app.resourceManager.getResourceByName(JPEGRESOURCE if scenario["resource"] == "jpeg" else GIFRESOURCE)
+
+    return app, context
+
+def runMemoryScenario(scenario:dict) -> dict:
+
+    app, context = createScenarioApp(scenario)
+
+    #first saver creates the images and resource handle all others share
+    app.board.generateSaver(context)
+    app.runFrame()
+
+    tracemalloc.start()
+
+    heapStart = tracemalloc.get_traced_memory()[0]
+
+    for _ in range(scenario["savers"] - 1):
+
+        app.board.generateSaver(context)
+
+    #a drawn saver also keeps its last draw state
+    app.runFrame()
+
+    bytesPerSaver = (tracemalloc.get_traced_memory()[0] - heapStart) / max(1, scenario["savers"] - 1)
+
+    tracemalloc.stop()
+
+    return {
+        "savers": scenario["savers"],
+        "resource": scenario["resource"],
+        "bytesPerSaver": round(bytesPerSaver, 1),
+        "targetBytesPerSaver": SAVERBYTESTARGETS[scenario["resource"]],
+        "withinTarget": bytesPerSaver <= SAVERBYTESTARGETS[scenario["resource"]],
+        "peakMemoryBytes": getPeakMemory()
+    }
+
+def runScenario(scenario:dict) -> dict:
+
+    app, context = createScenarioApp(scenario)
+
+    spawnStart = time.perf_counter()
+
+    saver = None
+
+    for _ in range(scenario["savers"]):
+
+        saver = app.board.generateSaver(context)
+
+    spawnTime = time.perf_counter() - spawnStart
+
+    #spawning allocations are not part of any frame
+    main.SURFACEALLOCATIONS.nextFrame()
+
+    timings = {phase: [] for phase in PHASES}
+    frameTimes = []
+    allocations = []
+
+    #every timed frame renders, otherwise frames with all savers in a corner pause would be skipped as static
+    app.idlePowerSaving = False
+
+    for _ in range(scenario["frames"]):
+
+        #real frame loop, its own profiler times the phases
+        app.runFrame()
+
+        frame = app.profiler.frames[-1]
+
+        for phase, marks in PHASES.items():
+
+            timings[phase].append(sum(frame.get(mark, 0) for mark in marks))
+
+        frameTimes.append(frame["total"])
+        allocations.append(main.SURFACEALLOCATIONS.lastFrame)
+
+    totalTime = sum(frameTimes) / 1000
+
+    staticCpu = None
+
+    if scenario["staticSeconds"] > 0:
+
+        app.fps = main.FPS
+        app.board.focusSaver(saver)
+
+        #first pass also lets wallhit overlays fade out
+        staticCpu = {
+            "fullRate": measureStaticCpu(app, scenario["staticSeconds"], False),
+            "idlePowerSaving": measureStaticCpu(app, scenario["staticSeconds"], True)
+        }
+
+    return {
+        "savers": scenario["savers"],
+        "resource": scenario["resource"],
+        "window": [scenario["width"], scenario["height"]],
+        "convertImages": scenario["convertImages"],
+        "renderScale": scenario["renderScale"],
+        "frames": scenario["frames"],
+        "spawnSeconds": round(spawnTime, 4),
+        "phasesMs": {phase: summarize(values) for phase, values in timings.items()},
+        "frameMs": summarize(frameTimes),
+        "fps": round(scenario["frames"] / totalTime, 2) if totalTime else None,
+        "surfaceAllocationsPerFrame": summarize(allocations),
+        "peakMemoryBytes": getPeakMemory(),
+        "staticCpuPercent": staticCpu,
+        "profile": app.getPerformanceSummary()
+    }
+
+def runScenarioInSubprocess(scenario:dict) -> dict:
+
+    #every scenario gets a fresh process, otherwise peak memory and caches leak between scenarios
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--scenario", json.dumps(scenario)],
+        capture_output=True,
+        text=True,
+        cwd=BASEDIRECTORY
+    )
+
+    if result.returncode != 0:
+
+        return {"scenario": scenario, "error": result.stderr.strip().splitlines()[-1:]}
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def parseSize(size:str) -> tuple[int, int]:
+
+    width, height = size.lower().split("x")
+
+    return (int(width), int(height))
+
+def parseArguments():
+
+    parser = argparse.ArgumentParser(description="Headless benchmark of Breaking Screensaver")
+
+    parser.add_argument("--counts", type=int, nargs="+", default=DEFAULTCOUNTS, help="saver counts to measure")
+    parser.add_argument("--resources", nargs="+", choices=DEFAULTRESOURCES, default=DEFAULTRESOURCES, help="resource types to measure")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULTSIZES, help="window sizes as WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=DEFAULTFRAMES, help="frames per scenario")
+    parser.add_argument("--seed", type=int, default=DEFAULTSEED, help="random seed for saver placement")
+    parser.add_argument("--conversions", nargs="+", choices=["on", "off"], default=DEFAULTCONVERSIONS, help="convert images to the display format, \"on off\" compares blit times")
+    parser.add_argument("--render-scales", type=float, nargs="+", default=DEFAULTRENDERSCALES, help="resolution of the board relative to the window, \"1 0.5\" compares fill cost")
+    parser.add_argument("--static-seconds", type=float, default=DEFAULTSTATICSECONDS, help="seconds of cpu measurement with all savers stopped, once rendering every frame and once in idle power saving mode, 0 skips it")
+    parser.add_argument("--memory-savers", type=int, default=DEFAULTMEMORYSAVERS, help="savers spawned per resource type to measure python memory per saver, 0 skips it")
+    parser.add_argument("--output", help="write json report to this file instead of stdout")
+    parser.add_argument("--scenario", help=argparse.SUPPRESS) #internal, runs one scenario in this process
+
+    return parser.parse_args()
+
+def runBenchmark():
+
+    arguments = parseArguments()
+
+    if arguments.scenario:
+
+        scenario = json.loads(arguments.scenario)
+
+        print(json.dumps(runMemoryScenario(scenario) if scenario.get("memory") else runScenario(scenario)))
+
+        return
+
+    with tempfile.TemporaryDirectory() as resourcesDirectory:
+
+        prepareResources(resourcesDirectory)
+
+        results = []
+
+        for resourceType in arguments.resources:
+
+            for size in arguments.sizes:
+
+                width, height = parseSize(size)
+
+                for count in arguments.counts:
+
+                    for conversion in arguments.conversions:
+
+                        for renderScale in arguments.render_scales:
+
+                            print(f"Running {count} {resourceType} savers at {width}x{height}, image conversion {conversion}, render scale {renderScale}", file=sys.stderr)
+
+                            results.append(runScenarioInSubprocess({
+                                "savers": count,
+                                "resource": resourceType,
+                                "width": width,
+                                "height": height,
+                                "frames": arguments.frames,
+                                "seed": arguments.seed,
+                                "convertImages": conversion == "on",
+                                "renderScale": renderScale,
+                                "staticSeconds": arguments.static_seconds,
+                                "resourcesDirectory": resourcesDirectory
+                            }))
+
+        memoryResults = []
+
+        if arguments.memory_savers > 0:
+
+            width, height = parseSize(arguments.sizes[0])
+
+            for resourceType in arguments.resources:
+
+                print(f"Measuring memory of {arguments.memory_savers} {resourceType} savers", file=sys.stderr)
+
+                memoryResults.append(runScenarioInSubprocess({
+                    "memory": True,
+                    "savers": arguments.memory_savers,
+                    "resource": resourceType,
+                    "width": width,
+                    "height": height,
+                    "seed": arguments.seed,
+                    "convertImages": arguments.conversions[0] == "on",
+                    "renderScale": arguments.render_scales[0],
+                    "resourcesDirectory": resourcesDirectory
+                }))
+
+    report = json.dumps({
+        "environment": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(str(part) for part in pygame.get_sdl_version()),
+            "platform": platform.platform(),
+            "machine": platform.machine()
+        },
+        "scenarios": results,
+        "memory": memoryResults
+    }, indent=4)
+
+    if arguments.output:
+
+        with open(arguments.output, "w") as outputFile:
+
+            outputFile.write(report)
+
+    else:
+
+        print(report)
+
+if __name__ == "__main__":
+
+    runBenchmark()
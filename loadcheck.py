@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+#check runs without a window, so the dummy driver must be set before pygame is initialized in main
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+BASEDIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+os.chdir(BASEDIRECTORY)
+
+import pygame
+
+import main
+import benchmark
+
+
+#fractional sizes like most window sizes give, whole ones like the benchmark
+SIZES = ((137.6, 91.3), (301, 77), (144, 108))
+
+LOADTIMEOUT = 30 # seconds a background load may take before the check gives up
+
+
+def getPixels(value) -> list[bytes]:
+
+    surfaces = value if isinstance(value, list) else [value]
+
+    return [pygame.image.tobytes(surface, "RGBA") for surface in surfaces]
+
+def loadPixels(acquire, file:str, width:float, height:float, fading:bool, background:bool) -> list[bytes]:
+
+    entry = acquire(file, width, height, fading, background)
+
+    deadline = time.perf_counter() + LOADTIMEOUT
+
+    while entry.value is None:
+
+        if time.perf_counter() > deadline: raise TimeoutError(f"{file} did not finish loading")
+
+        time.sleep(0.005)
+
+        main.IMAGECACHE.finishLoading()
+
+    pixels = getPixels(entry.value)
+
+    #source entries are released with it, so the next load decodes the file again
+    main.IMAGECACHE.release(entry)
+
+    return pixels
+
+def checkFile(file:str) -> list[str]:
+
+    failures = []
+
+    #still image of an animation is shown until its frames are loaded
+    acquires = [main.acquireScaledImage]
+
+    if main.isResourceIsAnimation(file): acquires.append(main.acquireScaledFrames)
+
+    for acquire in acquires:
+
+        for width, height in SIZES:
+
+            for fading in (False, True):
+
+                synchronous = loadPixels(acquire, file, width, height, fading, False)
+                background = loadPixels(acquire, file, width, height, fading, True)
+
+                if synchronous != background:
+
+                    failures.append(f"{os.path.basename(file)}: {acquire.__name__} at {width}x{height}, fading {fading}, pixels differ between loader threads and main thread")
+
+    if main.isResourceIsAnimation(file): failures += checkStream(file)
+
+    return failures
+
+def checkStream(file:str) -> list[str]:
+
+    failures = []
+
+    for width, height in SIZES:
+
+        preloaded = loadPixels(main.acquireScaledFrames, file, width, height, False, True)
+
+        entry = main.acquireAnimationStream(file, width, height, main.FrameCache(main.FRAMECACHEBUDGET * 1024 * 1024))
+
+        streamed = [pygame.image.tobytes(entry.value.getFrame(index), "RGBA") for index in range(entry.value.frameCount)]
+
+        main.IMAGECACHE.release(entry)
+
+        if streamed != preloaded:
+
+            failures.append(f"{os.path.basename(file)}: streamed frames at {width}x{height} differ from preloaded frames")
+
+    return failures
+
+def checkSpawning(app) -> list[str]:
+
+    #savers spawned like the buttons do, every resource at once
+    app.asyncLoading = True
+
+    savers = app.board.spawnSavers(app.resourceManager.getAllResources(), len(app.resourceManager.getAllResources()))
+
+    deadline = time.perf_counter() + LOADTIMEOUT
+
+    while main.IMAGECACHE.isLoading():
+
+        if time.perf_counter() > deadline: return ["spawned savers did not finish loading"]
+
+        time.sleep(0.005)
+
+        app.runFrame()
+
+    app.runFrame()
+
+    return [f"{saver.resourceManager.resourcesName}: spawned saver is not ready" for saver in savers if not saver.resourceManager.isReady()]
+
+def parseArguments():
+
+    parser = argparse.ArgumentParser(description="Checks that images loaded in loader threads have the same pixels as images loaded on the main thread")
+
+    return parser.parse_args()
+
+def runCheck():
+
+    parseArguments()
+
+    with tempfile.TemporaryDirectory() as resourcesDirectory:
+
+        #installed packs and the generated animated pack of the benchmark, the repository has no animated pack
+        shutil.copytree(main.RESOURCESDIRECTORY, resourcesDirectory, dirs_exist_ok=True)
+
+        benchmark.generateGifResource(os.path.join(resourcesDirectory, benchmark.GIFRESOURCE))
+
+        main.RESOURCESDIRECTORY = resourcesDirectory
+
+        app = main.App()
+
+        app.board.clearSavers()
+
+        #stored pixels would be read back by the second load, every load has to decode the file
+        main.DISKPIXELCACHE.enabled = False
+
+        files = sorted({
+            main.generatePathToImageResource(context["resourceName"], context[name])
+            for context in app.resourceManager.getAllResources()
+            for name in ("idle", "wallhit", "cornerhit")
+            if context.get(name, "-") != "-"
+        })
+
+        failures = []
+
+        for file in files:
+
+            failures += checkFile(file)
+
+        failures += checkSpawning(app)
+
+        app.board.clearSavers()
+
+    for failure in failures:
+
+        print(failure, file=sys.stderr)
+
+    print(f"{len(files)} files checked, {len(failures)} failures")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+
+    runCheck()
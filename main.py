@@ -3,8 +3,25 @@ import sys
 import os
 import random
 import json
+import time
+import collections
+import concurrent.futures
+import hashlib
+import mmap
+import math
+import threading
+import bisect
+import argparse
+import tempfile
 from PIL import Image
 
+try:
+    
+    import numpy
+    
+except ImportError:
+    
+    numpy = None
 
 
 pygame.font.init()
@@ -16,10 +33,62 @@ STARTHEIGHT = 600
 
 TITLE = "Breaking Screensaver"
 
-FPS = 60
+FPS = 60 # target of rendered frames per second
+
+FIXEDTIMESTEP = False # advance savers in fixed steps of simulation time, independent of how fast frames are rendered
+SIMULATIONRATE = 60 # simulation steps per second with fixed timestep
+MAXSIMULATIONSTEPS = 5 # steps one frame can catch up, time beyond that is dropped so a slow frame doesn't cause more slow frames
+IDLEPOWERSAVING = False # frames where nothing changed aren't rendered, the loop sleeps until an event or the end of a corner pause
+IDLEMAXWAIT = 1000 # longest sleep in ms of an idle frame
+
+RESIZEDEBOUNCE = 100 # ms without new resize events before the window resize is applied
+
+DIRTYRECTRENDERING = False # update only changed parts of the window instead of flipping all of it every frame
+
+FILTEREVENTS = False # keep event types nothing is subscribed to out of the SDL queue, window events always get through
+
+SHOWSURFACEALLOCATIONS = False # show surfaces allocated during the last frame in the window title
+
+PROFILERFRAMES = 600 # how many last frames the profiler keeps
+PROFILEFILE = None # path where profiler data is written on exit, None to disable
+HUDKEY = pygame.K_F3 # toggles performance overlay
+HUDUPDATEINTERVAL = 250 # ms between overlay text updates
+
+ASYNCLOADING = True # decode images of savers spawned by buttons in loader threads, scaling stays on the main thread
+LOADERTHREADS = 4
+LOADINGCOLOR = (200, 200, 200) # placeholder color of savers whose images are still loading
+
+PARALLELSTARTUP = False # scan resource directories in threads and decode all images in worker processes at startup
+STARTUPWORKERS = os.cpu_count() or 1
+
+DISKCACHE = False # keep decoded and scaled pixels on disk and memory map them on later runs
+DISKCACHEDIRECTORY = ".cache"
+
+STREAMINGANIMATIONS = False # decode gif frames when they are shown instead of all of them up front
+FRAMECACHEBUDGET = 128 # MB of decoded frames streamed animations keep, "frameCacheBudget" in context.json sets it per resource
+STREAMREADAHEAD = 4 # frames decoded ahead in loader threads while an animation streams
+
+CONVERTIMAGES = True # convert cached images to the pixel format of the window, so blits do not convert every pixel
+
+ATLASPACKING = False # copy scaled images and frames of all savers into a few big atlas surfaces
+ATLASSIZE = 4096 # max width and height of one atlas surface
 
 RESOURCESDIRECTORY = "resources"
 
+CORNERHITPAUSE = 2500 # ms saver stays still after hitting a corner
+CORNERHITPAUSETOLERANCE = 1e-6 # ms, simulation times are sums of fractional tick lengths, float error mustn't decide which update ends a pause
+
+FADESTARTALPHA = 300 # wallhit overlay alpha right after the hit, values above 255 keep it fully visible for a few frames
+
+RENDERSCALE = 1 # board and savers are drawn at this fraction of the window resolution and scaled up once per frame, gui stays sharp
+RENDERSCALESMOOTH = True # filter the upscale, otherwise pixels are just repeated
+
+VECTORIZEDPHYSICS = False # update all savers at once with numpy (if installed) instead of one by one
+
+SAVERCOLLISIONS = False # savers bounce off each other, showing their wallhit image like on a wall hit
+
+SHAREDANIMATIONCLOCK = False # animated images take their frame from one clock instead of stepping their own index on every draw, hidden overlays keep running instead of resuming where they stopped
+
 WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 BLACK = (0, 0, 0)
@@ -37,7 +106,8 @@ GUIWIDTHRATIO = 0.075 # multiply app width by this to get gui width
 GUIHEIGHTRATIO = 0.083 # multiply app height by this to get gui height
 
 #funny font
-SANS = pygame.font.Font("data\\sans.ttf", 48)
+SANS = pygame.font.Font(os.path.join("data", "sans.ttf"), 48)
+HUDFONT = pygame.font.Font(os.path.join("data", "sans.ttf"), 14)
 
 
 class App:
@@ -48,18 +118,66 @@ class App:
         self.height = height
         
         self._root = pygame.display.set_mode((self.width, self.height), pygame.RESIZABLE)
+        self._displayFormat = getDisplayFormat()
         
         pygame.display.set_caption(TITLE)
-        pygame.display.set_icon(pygame.image.load("data\\icon.ico"))
+        pygame.display.set_icon(pygame.image.load(os.path.join("data", "icon.ico")))
         
         self._clock = pygame.time.Clock()
         
+        self.eventRouter = EventRouter()
+        
+        self.eventRouter.subscribe(pygame.QUIT, self.onQuit)
+        self.eventRouter.subscribe(pygame.KEYDOWN, self.onKeyDown)
+        self.eventRouter.subscribe(pygame.VIDEORESIZE, self.onResize)
+        self.eventRouter.subscribe(pygame.VIDEOEXPOSE, self.onExpose)
+        self.eventRouter.subscribe(pygame.WINDOWEXPOSED, self.onExpose)
+        
+        for eventType in (pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN):
+            
+            self.eventRouter.subscribe(eventType, self.onWindowHidden)
+            
+        for eventType in (pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWMAXIMIZED):
+            
+            self.eventRouter.subscribe(eventType, self.onWindowShown)
+        
+        self.fps = FPS # 0 runs unthrottled
+        
+        #last frame was static, so the next one waits for a change instead of a clock tick
+        self.idlePowerSaving = IDLEPOWERSAVING
+        self.windowVisible = True
+        self._idleFrame = False
+        self._wakeEvent:pygame.event.Event = None
+        
+        #with fixed timestep savers are drawn between their last two positions, interpolation is how far
+        self.fixedTimestep = FIXEDTIMESTEP
+        self.tickMs = 1000 / SIMULATIONRATE
+        self.simulationTime = 0
+        self.interpolation:float = None
+        self._accumulator = 0
+        self._lastSimulationUpdate:float = None
+        
         self.board:Board = Board(self)
         
         self.events:list[pygame.event.Event] = None
         
+        self._pendingResize:tuple[int, int] = None
+        self._lastResizeEventTime = 0
+        
+        self.dirtyRendering = DIRTYRECTRENDERING
+        self._needsFullRedraw = True
+        
+        self.asyncLoading = ASYNCLOADING
+        
+        self.profiler = FrameProfiler()
+        self.profileFile = PROFILEFILE
+        
+        self.hudEnabled = False
+        self._hudSurface:pygame.Surface = None
+        self._lastHudUpdateTime = 0
+        
         self.resourceManager = ResourceManager()
-        self.resourceManager.loadResourcesFromMainDirectory()
+        self.resourceManager.loadResourcesFromMainDirectory(PARALLELSTARTUP, printStartupProgress)
         
         self.lastGuiIndex = 0
         
@@ -98,11 +216,15 @@ class App:
         self.addGuiElement(self.speedInput)
         
         self.board.addSaver(self.resourceManager.getResourceByName("waltuh"), -1, -1, 5)
-
+        
+        if FILTEREVENTS: self.eventRouter.blockUnsubscribedEvents()
+    
     def addGuiElement(self, element):
         
         self.guiElements.append(element)
         
+        element.subscribeEvents(self.eventRouter)
+        
         self.lastGuiIndex += 1
     
     def getSpeed(self):
@@ -129,803 +251,3234 @@ class App:
                 )
             )
     
-    def _handleEvents(self):
+    def onQuit(self, event:pygame.event.Event):
+        
+        self.quit()
+    
+    def quit(self):
+        
+        if self.profileFile: self.dumpProfile(self.profileFile)
+        
+        pygame.quit()
+        sys.exit()
+    
+    def onKeyDown(self, event:pygame.event.Event):
         
-        for event in self.events:
+        if event.key == HUDKEY:
             
-            if event.type == pygame.QUIT:
-                
-                pygame.quit()
-                sys.exit()    
-                
-            elif event.type == pygame.VIDEORESIZE:
-                
-                self.width = event.w
-                self.height = event.h 
-                 
-                self.board.resize()
-                
-                for element in self.guiElements:
-                    
-                    element.resize()
+            self.hudEnabled = not self.hudEnabled
+            
+            #overlay covers part of the board which has to be restored when it's hidden
+            self._hudSurface = None
+            self._needsFullRedraw = True
     
-    def draw(self, surface: pygame.Surface, rect: pygame.Rect):
+    def onResize(self, event:pygame.event.Event):
         
-        self._root.blit(surface, rect)
+        #resize events come in bursts while the window edge is dragged, only the last one is applied
+        self._pendingResize = (event.w, event.h)
+        self._lastResizeEventTime = self.getTime()
     
-    def getTime(self) -> int:
+    def onExpose(self, event:pygame.event.Event):
         
-        return pygame.time.get_ticks()
+        self._needsFullRedraw = True
     
-    def getRandomResource(self):
+    def onWindowHidden(self, event:pygame.event.Event):
         
-        return self.resourceManager.getRandomResource()
+        self.windowVisible = False
     
-    def idle(self):
+    def onWindowShown(self, event:pygame.event.Event):
         
-        while True:
-            #delay
-            self._clock.tick(FPS)
+        self.windowVisible = True
+        self._needsFullRedraw = True
+    
+    def applyPendingResize(self):
+        
+        if self._pendingResize and self.getTime() - self._lastResizeEventTime >= RESIZEDEBOUNCE:
+            
+            self.resize(*self._pendingResize)
+    
+    def resize(self, width:int, height:int):
+        
+        self._pendingResize = None
+        
+        self.width = width
+        self.height = height
+        
+        #window surface can get another pixel format after resize, images which stay cached are converted again
+        displayFormat = getDisplayFormat()
+        
+        if displayFormat != self._displayFormat:
             
-            #handle important app events
-            self.events = pygame.event.get()
+            self._displayFormat = displayFormat
             
-            self._handleEvents()
-            self.board.handleEvents()
+            IMAGECACHE.convertToDisplayFormat()
             
-            #logic
-            for guiElement in self.guiElements:
+            for frameCache in (FRAMECACHE, *FRAMECACHES.values()):
                 
-                guiElement.handleEvents()
+                frameCache.clear()
                 
-            self.board.updateSavers()
+            PLACEHOLDERS.clear()
+         
+        self.board.resize()
+        
+        for element in self.guiElements:
             
-            #drawing
-            self._root.fill(WHITE)
+            element.resize()
             
-            for guiElement in self.guiElements:
-                
-                guiElement.draw()
-                
-            self.board.render()
+        self.eventRouter.invalidateAreas()
             
-            pygame.display.flip()
-
-class Board:
+        self._needsFullRedraw = True
     
-    def __init__(self, app: App):
-        
-        self._app = app
-        
-        self.width = self._app.width * BOARDRATIO
-        self.height = self._app.height * BOARDRATIO
+    def draw(self, surface: pygame.Surface, rect: pygame.Rect):
         
-        self._root = pygame.Surface((self.width, self.height))
-        self.rect = self._root.get_rect(topleft = (self._app.width * OFFSETRATIO, self._app.height * OFFSETRATIO))
+        self._root.blit(surface, rect)
+    
+    def getTime(self) -> int:
         
-        self._savers: list[Saver] = []
+        return pygame.time.get_ticks()
+    
+    def getSimulationTime(self) -> float:
         
-        self.focusedOnSaver = False
+        #clock of saver motion, corner pauses measured with it can't drift against movement
+        return self.simulationTime if self.fixedTimestep else self.getTime()
     
-    def clearSavers(self):
+    def getRandomResource(self):
         
-        self._savers = []
+        return self.resourceManager.getRandomResource()
     
-    def addSaver(self, context:dict, x:int, y:int, speed:int, dirX:int = 1, dirY:int = 1):
+    def idle(self, frames:int = None):
         
-        self._savers.append(Saver(self._app, self, context, x, y, speed, dirX, dirY))
+        #runs until the window is closed, scripted scenes can stop after a number of frames
+        while frames is None or frames > 0:
+            
+            self.waitForFrame()
+            
+            self.runFrame()
+            
+            if frames is not None: frames -= 1
+            
+        self.quit()
     
-    def generateSaver(self, context: dict):
+    def waitForFrame(self):
         
-        saverSize = getCurrentSaversSize(self)
-
-
-        x = random.randint(int((self.rect.x * 2) + 1), int((self.width - saverSize[0] + self.rect.x) - 1))        
-        y = random.randint(int((self.rect.y * 2) + 1), int((self.height - saverSize[1] + self.rect.y) - 1))
-
-        speed = self._app.getSpeed()
+        if not self._idleFrame:
+            #delay
+            self._clock.tick(self.fps)
+            
+            return
         
-        dirX = random.choice([1,-1])
-        dirY = random.choice([1,-1])
+        #nothing changed in the last frame, so sleeping until an event or until a paused saver moves again
+        timeout = self.board.getTimeUntilMotion() if self.windowVisible else None
         
-        self.addSaver(context, x, y, speed, dirX, dirY)
-
-    def handleEvents(self):
-
-        for event in self._app.events:
-            
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                
-                isFocused = False
-                
-                for saver in self._savers:
-                    
-                    if saver.rect.collidepoint(event.pos):
-                        
-                        isFocused = True
-                        saver.focus = True
-                        
-                    else:
-                        
-                        saver.focus = False
-                        
-                self.focusedOnSaver = isFocused
-                
-            elif event.type == pygame.KEYDOWN:
-                
-                if event.key == 127: # 127 = del
-                    
-                    if self.focusedOnSaver:
-                        
-                        for saver in self._savers:
-                            
-                            if saver.focus:
-                                
-                                self._savers.remove(saver)
-                                
-                        self.focusedOnSaver = False
-
-    def render(self):
+        #savers only move on simulation steps
+        if timeout is not None and self.fixedTimestep: timeout = max(timeout, self.tickMs - self._accumulator)
         
-        self._root.fill(WHITE)
+        timeout = IDLEMAXWAIT if timeout is None else max(1, min(math.ceil(timeout) + 1, IDLEMAXWAIT))
         
-        pygame.draw.rect(self._root, BLACK, (self.rect.x, self.rect.y, self.rect.width - self.rect.x, self.rect.height - self.rect.y), 2)
+        waitStart = time.perf_counter()
+        
+        event = pygame.event.wait(timeout)
         
-        self._app.draw(self._root, self.rect)
+        #event is handled by the next frame like every other one, posting it again would put it behind newer ones
+        if event.type != pygame.NOEVENT: self._wakeEvent = event
         
-        for saver in self._savers:
+        if self.fixedTimestep and self._lastSimulationUpdate is not None:
             
-            saver.draw()
+            #nothing moved while sleeping, so the slept time passes at once instead of in capped steps
+            waited = time.perf_counter() - waitStart
+            
+            self.simulationTime += waited * 1000
+            self._lastSimulationUpdate += waited
     
-    def resize(self):
+    def runFrame(self):
         
-        self.width = self._app.width * BOARDRATIO
-        self.height = self._app.height * BOARDRATIO
-
-        self._root = pygame.Surface((self.width, self.height))
+        self.profiler.startFrame()
         
-        self.rect = self._root.get_rect(topleft = (self._app.width * OFFSETRATIO, self._app.height * OFFSETRATIO))
+        self.handleEvents()
         
-        for saver in self._savers:
+        if self.idlePowerSaving and not self.windowVisible:
             
-            saver.resizeOnBoard()
-
-    def updateSavers(self):
-        
-        if self.focusedOnSaver: return
-
-        for saver in self._savers:
+            #hidden window shows nothing, savers stay where they are until it's back
+            self._idleFrame = True
             
-            saver.update()       
-
-class Saver:
-    
-    def __init__(self, 
-                 app:App, 
-                 board:Board, 
-                 context, 
-                 x:int, y:int, 
-                 speed:int, 
-                 startDirX:int = 1, 
-                 startDirY:int = 1):
+        else:
+            
+            self.update()
+            
+            self._idleFrame = self.idlePowerSaving and self.isStaticFrame()
+            
+            #drawing, skipped when the screen already shows this frame
+            if not self._idleFrame: self.render()
         
-        self._app = app
+        self.profiler.endFrame()
         
-        self.board = board
+        SURFACEALLOCATIONS.nextFrame()
         
-        self.width = board.width * IMAGERATIO
-        self.height = board.height * IMAGERATIO
+        #advanced after the frame, savers created before the next one start their animations at the tick it draws
+        ANIMATIONCLOCK.advance()
         
-        self.speed = speed
+        if SHOWSURFACEALLOCATIONS:
+            
+            pygame.display.set_caption(f"{TITLE} - surfaces per frame: {SURFACEALLOCATIONS.lastFrame}")
+    
+    def handleEvents(self):
         
-        self.resourceManager = SaverResourceManager(self)
-        self.resourceManager.loadResourcesFromContext(context)
+        #every event goes only to the app, board and gui handlers subscribed to it
+        self.events = pygame.event.get()
         
-        actualX = x
-        if actualX == -1:
-            actualX = (self.board.width / 2) - self.width
+        #event which ended the idle sleep came before all of them
+        if self._wakeEvent is not None:
             
-        actualY = y
-        if actualY == -1:
-            actualY = (self.board.height / 2) - self.height
+            self.events.insert(0, self._wakeEvent)
+            
+            self._wakeEvent = None
         
-        self.rect = self.resourceManager.idleImage.image.get_rect(topleft=(actualX, actualY))
+        self.eventRouter.dispatch(self.events)
         
-        self.wallHitted = False
-
-        self.focus = False
-
-        self.cornerHitted = False
-        self.lastCornerHitTime = None
+        self.applyPendingResize()
         
-        self.directionX = startDirX
-        self.directionY = startDirY
+        self.profiler.mark("events")
     
-    def resizeOnBoard(self):
+    def isStaticFrame(self) -> bool:
         
-        self.width = self.board.width * IMAGERATIO
-        self.height = self.board.height * IMAGERATIO
-        
-        self.resourceManager.createImages() #recreate images again
+        #rendering now would draw exactly what is on the screen
+        if self.events or self._needsFullRedraw or self._pendingResize or self.hudEnabled or IMAGECACHE.isLoading(): return False
         
-        self.rect = self.resourceManager.idleImage.image.get_rect(topleft=(self.rect.x, self.rect.y))
+        if any(guiElement.needsRedraw() for guiElement in self.guiElements): return False
         
-    def hitWall(self):
+        return not self.board.needsRedraw()
+    
+    def update(self):
         
-        self.wallHitted = True
+        IMAGECACHE.finishLoading()
+        SPRITEATLAS.update()
+        self.profiler.mark("resourceLoading")
         
-        self.resourceManager.hitWall()
+        #logic
+        if self.fixedTimestep:
+            
+            self.updateSimulation()
+            
+        else:
+            
+            self.board.updateSavers()
+            
+        self.profiler.mark("updateSavers")
     
-    def cornerHit(self):
+    def updateSimulation(self):
         
-        self.cornerHitted = True
-        self.wallHitted = False
+        now = time.perf_counter()
         
-        self.lastCornerHitTime = self._app.getTime()
+        #first call only starts measuring
+        if self._lastSimulationUpdate is not None: self._accumulator += (now - self._lastSimulationUpdate) * 1000
         
-    def update(self):
+        self._lastSimulationUpdate = now
         
-        if self.cornerHitted:
+        steps = 0
+        
+        while self._accumulator >= self.tickMs:
             
-            if self._app.getTime() - self.lastCornerHitTime > 2500:
+            if steps == MAXSIMULATIONSTEPS:
                 
-                self.cornerHitted = False
+                self._accumulator %= self.tickMs
                 
-            return
+                break
+            
+            self.simulationTime += self.tickMs
+            
+            self.board.updateSavers()
+            
+            self._accumulator -= self.tickMs
+            
+            steps += 1
+            
+        self.interpolation = self._accumulator / self.tickMs
+    
+    def getPerformanceSummary(self) -> dict:
         
-        self.rect.x += self.speed * self.directionX
-        self.rect.y += self.speed * self.directionY
+        summary = self.profiler.getSummary()
         
-        xHitted = False
+        summary["savers"] = self.board.getSaverCount()
+        summary["imageCacheHitRate"] = IMAGECACHE.statistics.getHitRate()
+        summary["textCacheHitRate"] = TEXTCACHESTATISTICS.getHitRate()
+        summary["diskCacheHitRate"] = DISKPIXELCACHE.statistics.getHitRate()
+        summary["frameCacheHitRate"] = FRAMECACHE.statistics.getHitRate()
+        summary["frameCacheBytes"] = sum(frameCache.size for frameCache in (FRAMECACHE, *FRAMECACHES.values()))
+        summary["atlasSurfaces"] = len(SPRITEATLAS.surfaces)
+        summary["surfaceAllocationsLastFrame"] = SURFACEALLOCATIONS.lastFrame
         
-        if self.rect.x >= self.board.width - self.width + self.board.rect.x:
-            
-            self.directionX = -self.directionX
-            
-            self.rect.x = (self.board.width - self.width + self.board.rect.x) - 1
+        return summary
+    
+    def dumpProfile(self, path:str):
+        
+        with open(path, "w") as profileFile:
             
-            self.hitWall()
+            json.dump({"summary": self.getPerformanceSummary(), "frames": list(self.profiler.frames)}, profileFile, indent=4)
+    
+    def getHudRect(self) -> pygame.Rect:
+        
+        return self._hudSurface.get_rect(topleft=(self.board.rect.x * 2 + 4, self.board.rect.y * 2 + 4))
+    
+    def drawHud(self):
+        
+        #text is rendered a few times per second only, so the overlay itself barely shows up in the profile
+        if self._hudSurface is None or self.getTime() - self._lastHudUpdateTime >= HUDUPDATEINTERVAL:
             
-            xHitted = True
+            summary = self.getPerformanceSummary()
             
-        elif self.rect.x <= self.board.rect.x * 2:
+            frameTimes = summary["frameMs"]
             
-            self.directionX = -self.directionX
+            lines = [
+                f"FPS: {summary['fps']:.1f}",
+                f"frame ms p50/p95/p99: {frameTimes['p50']:.2f} / {frameTimes['p95']:.2f} / {frameTimes['p99']:.2f}",
+                f"savers: {summary['savers']}",
+                f"image cache hits: {summary['imageCacheHitRate'] * 100:.0f}%",
+                f"text cache hits: {summary['textCacheHitRate'] * 100:.0f}%"
+            ]
             
-            self.rect.x = (self.board.rect.x * 2) + 1
+            lines += [f"{phase}: {times['mean']:.2f} ms" for phase, times in summary["phasesMs"].items()]
             
-            self.hitWall()
+            renderedLines = [HUDFONT.render(line, True, WHITE) for line in lines]
             
-            xHitted = True
+            lineHeight = HUDFONT.get_linesize()
             
-        if self.rect.y >= self.board.height - self.height + self.board.rect.y:
+            self._hudSurface = createSurface((max(line.get_width() for line in renderedLines) + 8, lineHeight * len(lines) + 8))
+            self._hudSurface.fill(BLACK)
             
-            self.directionY = -self.directionY
+            for index, line in enumerate(renderedLines):
+                
+                self._hudSurface.blit(line, (4, 4 + index * lineHeight))
             
-            self.rect.y = (self.board.height - self.height + self.board.rect.y) - 1
+            self._lastHudUpdateTime = self.getTime()
+        
+        self.draw(self._hudSurface, self.getHudRect())
+    
+    def render(self):
+        
+        if not self.dirtyRendering or self._needsFullRedraw:
             
-            self.hitWall()
+            self._root.fill(WHITE)
             
-            if xHitted:
+            for guiElement in self.guiElements:
                 
-                self.cornerHit()
+                guiElement.draw()
                 
-            else:
+            self.profiler.mark("guiDraw")
                 
-                self.hitWall()  
+            self.board.render()
+            self.profiler.mark("boardRender")
+            
+            if self.hudEnabled:
                 
-        elif self.rect.y <= self.board.rect.y * 2:
+                self.drawHud()
+                self.profiler.mark("hud")
             
-            self.directionY = -self.directionY
+            pygame.display.flip()
+            self.profiler.mark("flip")
             
-            self.rect.y = (self.board.rect.y * 2) + 1
+            self._needsFullRedraw = False
             
-            if xHitted:
-                
-                self.cornerHit()
-                
-            else:
-                
-                self.hitWall()  
-
-    def draw(self):
+            return
         
-        surface = pygame.Surface((self.rect.width, self.rect.height))
+        dirtyRects = []
         
-        if self.focus:
+        #overlay changes every frame, so its area is always redrawn
+        hudRects = [self.getHudRect()] if self.hudEnabled and self._hudSurface else []
+        
+        if any(guiElement.needsRedraw() for guiElement in self.guiElements):
             
-            surface.fill(RED)
-        else:
+            #captions overlap neighbour elements, so the whole gui column is redrawn
+            guiColumn = self.guiElements[0].getDrawnRect().unionall([guiElement.getDrawnRect() for guiElement in self.guiElements])
             
-            surface = self.resourceManager.render()
+            self._root.fill(WHITE, guiColumn)
             
-        app.draw(surface, self.rect)
-       
-class GuiElement:
+            for guiElement in self.guiElements:
+                
+                guiElement.draw()
+                
+            dirtyRects.append(guiColumn)
+            
+        self.profiler.mark("guiDraw")
+            
+        dirtyRects += self.board.renderDirty(hudRects)
+        self.profiler.mark("boardRender")
+        
+        if self.hudEnabled:
+            
+            self.drawHud()
+            self.profiler.mark("hud")
+            
+            dirtyRects.append(self.getHudRect())
+        
+        if dirtyRects: pygame.display.update(dirtyRects)
+        
+        self.profiler.mark("flip")
+
+class Board:
     
-    def __init__(self, 
-                 app:App, 
-                 indexInColumn:int, 
-                 width:float, 
-                 height:float, 
-                 x:int, y:int, 
-                 text:str = "", 
-                 bgColor:tuple[int, int, int] = WHITE, 
-                 textColor:tuple[int, int, int] = BLACK):
+    def __init__(self, app: App):
         
-        self.app = app
+        self._app = app
         
-        self.indexInColumn = indexInColumn
+        self.width = self._app.width * BOARDRATIO
+        self.height = self._app.height * BOARDRATIO
         
-        self.width = width
-        self.height = height
+        self._root = createSurface((self.width, self.height))
+        self.rect = self._root.get_rect(topleft = (self._app.width * OFFSETRATIO, self._app.height * OFFSETRATIO))
         
-        self.text = text
+        self.renderScale = RENDERSCALE
+        self.createRenderTarget()
         
-        self.surface = pygame.Surface((self.width, self.height))
+        #saver id -> saver, ids only grow so iteration order is spawn order, which is also drawing order
+        self._savers:dict[int, Saver] = {}
+        self._nextSaverId = 0
         
-        self.rect = self.surface.get_rect(topleft = (x, y))
+        self.spatialGrid = SpatialGrid(max(getCurrentSaversSize(self)))
         
-        self.bgColor = bgColor
-        self.textColor = textColor
-    
-    def renderText(self) -> pygame.Surface:
+        #solid surfaces drawn instead of focused savers, one per saver size
+        self._focusSurfaces:dict[tuple[int, int], pygame.Surface] = {}
         
-        return resizeImage(SANS.render(self.text, True, self.textColor), self.width, self.height)
-    
-    def draw(self):
+        #areas of removed savers which are still on the screen
+        self._removedRects:list[pygame.Rect] = []
         
-        self.surface.fill(self.bgColor)
+        self.focusedOnSaver = False
+        self.focusedSaver:Saver = None
         
-        self.app.draw(self.surface, self.rect)
+        self.saverCollisions = SAVERCOLLISIONS
         
-        if self.text != "": self.app.draw(self.renderText(), self.rect)
-    
-    def resize(self):
+        self._app.eventRouter.subscribe(pygame.MOUSEBUTTONDOWN, self.onMouseButtonDown)
+        self._app.eventRouter.subscribe(pygame.KEYDOWN, self.onKeyDown)
         
-        self.width = self.app.width * GUIWIDTHRATIO
-        self.height = self.app.height * GUIHEIGHTRATIO
+        self.physicsEngine:SaverPhysicsEngine = None
         
-        self.surface = pygame.Surface((self.width, self.height))
+        if VECTORIZEDPHYSICS and numpy is not None:
+            
+            self.physicsEngine = SaverPhysicsEngine(self)
+    
+    def _invalidatePhysics(self):
         
-        self.rect = self.surface.get_rect(topleft = (
-           self.app.width * GUIXRATIO, 
-           (self.app.height * OFFSETRATIO) + ((self.app.height * GUIBETWEENRATIO) * self.indexInColumn) 
-        ))
-      
-    def handleEvents(self):
+        if self.physicsEngine: self.physicsEngine.invalidate()
+    
+    def getSaverCount(self) -> int:
         
-        pass
-
-class Button(GuiElement):
+        return len(self._savers)
     
-    def __init__(self, app:App, indexInColumn:int, width:float, height:float, x:int, y:int, text="", bgColor:tuple[int,int,int]=WHITE, textColor:tuple[int,int,int]=BLACK, command=None, args=None):
-        super().__init__(app, indexInColumn, width, height, x, y, text, bgColor, textColor)
+    def getSaver(self, saverId:int) -> "Saver":
         
-        self.command = command
-        self.args = args
+        return self._savers.get(saverId)
+    
+    def getSaverAt(self, position:tuple[int, int]) -> "Saver":
         
-    def handleEvents(self):
+        return self.spatialGrid.queryPoint(position)
+    
+    def clearSavers(self):
         
-        for event in self.app.events:
+        for saver in self._savers.values():
             
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                
-                if self.rect.collidepoint(event.pos):
-                    
-                    if self.command: 
-                        
-                        if self.args:
-                            
-                            self.command(self.args)
-                            
-                        else:
-                            
-                            self.command()
-
-class InputField(GuiElement):
-
-    def __init__(self, 
-                 app:App, 
-                 indexInColumn:int, 
-                 width:float, 
-                 height:float,
-                 x:int, y:int,
-                 caption:str = "",
-                 text:str = "",
-                 bgColor:tuple[int, int, int] = WHITE, 
-                 textColor:tuple[int, int, int] = BLACK):
-
-        super().__init__(app, indexInColumn, width, height, x, y, text, bgColor, textColor)
-
-        self.caption = caption
+            saver.release()
+            
+            self._removeFromScreen(saver)
         
-        self.captionSurface = self.renderCaption()
-        self.captionRect = self.captionSurface.get_rect(topleft=(self.rect.x, self.rect.y + (self.captionSurface.get_height() / 2) + 4))
-
-        self.focused = False
-
-    def clearLastSymbol(self):
+        self._savers = {}
         
-        self.text = self.text[0:len(self.text) - 1]
-
-    def renderCaption(self):
+        self.spatialGrid.clear()
         
-        return resizeImage(SANS.render(self.caption, True, self.textColor), self.width, self.height)
-
-    def resize(self):
+        self.focusedOnSaver = False
+        self.focusedSaver = None
         
-        super().resize()
+        self._invalidatePhysics()
+    
+    def addSaver(self, context:dict, x:int, y:int, speed:int, dirX:int = 1, dirY:int = 1, background:bool = False) -> "Saver":
         
-        self.captionSurface = self.renderCaption()
+        saver = Saver(self._app, self, context, x, y, speed, dirX, dirY, background)
         
-        self.captionRect = self.captionSurface.get_rect(topleft=(self.rect.x, self.rect.y + (self.captionSurface.get_height() / 2) + 4))
-
-    def draw(self):
+        saver.id = self._nextSaverId
+        self._nextSaverId += 1
         
-        self.surface.fill(self.bgColor)
+        self._savers[saver.id] = saver
         
-        if self.focused:
-            
-            self.surface.fill(RED)
-            
-        self.app.draw(self.surface, self.rect)
+        self.spatialGrid.insert(saver)
         
-        if self.text != "": self.app.draw(self.renderText(), self.rect)
+        self._invalidatePhysics()
         
-        self.app.draw(self.captionSurface, self.captionRect)
-
-    def handleEvents(self):
-
-        for event in self.app.events:
-            
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                
-                if self.rect.collidepoint(event.pos):
-                    
-                    self.focused = True
-                    
-                else:
-                    
-                    self.focused = False
-                    
-            elif event.type == pygame.KEYDOWN:
-                
-                if self.focused and event.key >= 48 and event.key <= 57 and len(self.text) < 4: #only numbers
-                    
-                    self.text += chr(event.key)
-                    
-                elif event.key == 8:
-                    
-                    self.clearLastSymbol()
-
-class ImageResource:
+        return saver
     
-    def __init__(self, resourceName:str, file:str, width:float, height:float):
+    def removeSaver(self, saverId:int):
         
-        self.resourceName = resourceName
-        
-        self.sourceFile = file
+        saver = self._savers.pop(saverId)
         
-        self.width = width
-        self.height = height
+        saver.release()
         
-        self.image = None
-        self.createImage()
+        self._removeFromScreen(saver)
         
-    def createImage(self):
+        self.spatialGrid.remove(saver)
         
-        self.image = resizeImage(pygame.image.load(self.sourceFile), self.width, self.height)
+        if saver is self.focusedSaver:
+            
+            self.focusedOnSaver = False
+            self.focusedSaver = None
         
-    def getImage(self):
+        self._invalidatePhysics()
+    
+    def generateSaver(self, context: dict) -> "Saver":
         
-        return self.image.copy()
+        saverSize = getCurrentSaversSize(self)
 
-class VanishingImageResource(ImageResource):
-    
-    def __init__(self, resourceName:str, file:str, width:float, height:float, alphaSpeed:int):
+
+        x = random.randint(int((self.rect.x * 2) + 1), int((self.width - saverSize[0] + self.rect.x) - 1))        
+        y = random.randint(int((self.rect.y * 2) + 1), int((self.height - saverSize[1] + self.rect.y) - 1))
+
+        speed = self._app.getSpeed()
         
-        super().__init__(resourceName, file, width, height)
+        dirX = random.choice([1,-1])
+        dirY = random.choice([1,-1])
         
-        self.alphaSpeed = alphaSpeed
-        self.currentAlpha = 0
+        #spawning happens inside the frame, so images are loaded in background
+        return self.addSaver(context, x, y, speed, dirX, dirY, self._app.asyncLoading)
     
-    def getImage(self):
+    def spawnSavers(self, contexts:list[dict], count:int, speed:int = None) -> list["Saver"]:
         
-        if self.currentAlpha <= 0:
-            
-            return None
+        #positions and directions of all savers are drawn at once, savers take the resources in turn
+        saverSize = getCurrentSaversSize(self)
         
-        image = super().getImage()
-        image.set_alpha(self.currentAlpha)
+        xs = random.choices(range(int((self.rect.x * 2) + 1), int((self.width - saverSize[0] + self.rect.x) - 1) + 1), k=count)
+        ys = random.choices(range(int((self.rect.y * 2) + 1), int((self.height - saverSize[1] + self.rect.y) - 1) + 1), k=count)
         
-        self.currentAlpha -= self.alphaSpeed
+        dirXs = random.choices((1, -1), k=count)
+        dirYs = random.choices((1, -1), k=count)
         
-        return image
-
-class AnimatedImageResource(ImageResource):
+        if speed is None: speed = self._app.getSpeed()
+        
+        #savers of one resource share the resource handle and images, only the first one sets them up
+        return [
+            self.addSaver(contexts[index % len(contexts)], x, y, speed, dirX, dirY, self._app.asyncLoading) 
+            for index, (x, y, dirX, dirY) in enumerate(zip(xs, ys, dirXs, dirYs))
+        ]
 
-    def __init__(self, resourceName:str, file:str, width:float, height:float):
+    def onMouseButtonDown(self, event:pygame.event.Event):
         
-        super().__init__(resourceName, file, width, height)
+        #only the saver drawn on top is focused
+        self.focusSaver(self.getSaverAt(event.pos))
+    
+    def focusSaver(self, saver:"Saver"):
         
-        self._frames = []
+        if self.focusedSaver: self.focusedSaver.focus = False
         
-        self.currentFrameIndex = 0
+        self.focusedSaver = saver
         
-        self.loadAnimation()
+        if self.focusedSaver: self.focusedSaver.focus = True
+                
+        self.focusedOnSaver = self.focusedSaver is not None
     
-    def loadAnimation(self):
+    def onKeyDown(self, event:pygame.event.Event):
         
-        with Image.open(self.sourceFile) as source:
+        if event.key == 127: # 127 = del
             
-            for index in range(1, source.n_frames):
-                
-                source.seek(index)
+            if self.focusedOnSaver:
                 
-                self._frames.append(resizeImage(pygame.image.fromstring(source.tobytes(), source.size, source.mode).convert(), self.width, self.height))
+                self.removeSaver(self.focusedSaver.id)
 
+    def createRenderTarget(self):
         
-    def getImage(self) -> pygame.Surface:
-        
-        frame = self._frames[self.currentFrameIndex]
-        
-        self.currentFrameIndex += 1
-        
-        if self.currentFrameIndex == len(self._frames):
+        #below render scale 1 savers are drawn to a smaller surface instead of the window
+        if self.renderScale == 1:
             
-            self.currentFrameIndex = 0
+            self._target = None
+            self._targetBackground = None
             
-        return frame.copy()
-
-class VanishingAnimatedImageResource(AnimatedImageResource):
-    
-    def __init__(self, resourceName:str, file:str, width:float, height:float, alphaSpeed:int):
+            return
         
-        super().__init__(resourceName, file, width, height)
+        size = (max(1, int(self.width * self.renderScale)), max(1, int(self.height * self.renderScale)))
         
-        self.alphaSpeed = alphaSpeed
-        self.currentAlpha = 0
+        self.drawBackground()
         
-    def getImage(self) -> pygame.Surface:
+        self._target = createSurface(size)
         
-        if self.currentAlpha <= 0:
-            
-            return None
+        #board surface doesn't change until resize, so it's scaled down only once
+        self._targetBackground = createSurface(size)
+        scaleToSurface(self._root, self._targetBackground)
+    
+    def drawBackground(self):
         
-        frame = super().getImage()
+        self._root.fill(WHITE)
         
-        frame.set_alpha(self.currentAlpha)
+        pygame.draw.rect(self._root, BLACK, (self.rect.x, self.rect.y, self.rect.width - self.rect.x, self.rect.height - self.rect.y), 2)
+    
+    def draw(self, surface:pygame.Surface, rect:pygame.Rect):
         
-        self.currentAlpha -= self.alphaSpeed
+        if self._target:
+            
+            self._target.blit(surface, rect)
+            
+        else:
+            
+            self._app.draw(surface, rect)
+    
+    def getTargetRect(self, rect:pygame.Rect) -> pygame.Rect:
         
-        return frame
+        #window rect -> rect on the render target
+        if not self._target: return rect
         
-class SaverResourceManager:
+        return pygame.Rect(
+            (rect.x - self.rect.x) * self.renderScale, 
+            (rect.y - self.rect.y) * self.renderScale, 
+            rect.width * self.renderScale, 
+            rect.height * self.renderScale
+        )
     
-    def __init__(self, saver:Saver):
+    def presentTarget(self):
         
-        self.saver = saver
+        #the only full resolution work of a scaled board, gui around it isn't touched
+        #window surface shrinks right away while the board keeps its size until the pending resize is applied,
+        #nothing is presented until then and the resize redraws everything
+        if not self._app._root.get_rect().contains(self.rect): return
         
-        self.alphaSpeed = int(self.saver.speed * 1.2)
+        scaleToSurface(self._target, self._app._root.subsurface(self.rect))
+    
+    def render(self):
         
-        self.idleImage = None
-        self.wallHitImage = None
-        self.cornerHitImage = None
+        #full redraw also covers the areas of removed savers
+        self._removedRects = []
         
-        self.wallHitEnabled = True
-        self.cornerHitEnabled = True
+        if self._target:
+            
+            self._target.blit(self._targetBackground, (0, 0))
+            
+        else:
+            
+            self.drawBackground()
+            
+            self._app.draw(self._root, self.rect)
         
-        self.resourcesName = "" 
-        self._sourceFiles = {}
+        for saver in self._savers.values():
+            
+            saver.draw()
+            
+        if self._target: self.presentTarget()
+    
+    def needsRedraw(self) -> bool:
         
-        self.animationReset = None
+        return bool(self._removedRects) or any(saver.needsRedraw() for saver in self._savers.values())
     
-    def hitWall(self):
+    def getTimeUntilMotion(self) -> float:
         
-        if (self.wallHitEnabled):
-            
-            self.wallHitImage.currentAlpha = 300
+        #ms of simulation time until a board which didn't change starts moving by itself, None when only an event can change it
+        if self.focusedOnSaver: return None
+        
+        time = self._app.getSimulationTime()
+        
+        waits = []
+        
+        for saver in self._savers.values():
             
-            if self.animationReset and self.wallHitImage.__class__ is VanishingAnimatedImageResource:
+            if saver.cornerHitted:
+                
+                waits.append(saver.lastCornerHitTime + CORNERHITPAUSE - time)
+                
+            elif saver.speed:
                 
-                self.wallHitImage.currentFrameIndex = 0
+                #moving saver with fixed timestep, it just hasn't had a simulation step this frame
+                return 0
+                
+        return min(waits, default=None)
     
-    def render(self) -> pygame.Surface:
+    def getFocusSurface(self, size:tuple[int, int]) -> pygame.Surface:
         
-        surface = self.idleImage.getImage()
+        surface = self._focusSurfaces.get(size)
         
-        if self.saver.wallHitted and self.wallHitEnabled:
+        if surface is None:
             
-            wallHitImage = self.wallHitImage.getImage()
+            surface = self._focusSurfaces[size] = createSurface(size)
+            surface.fill(RED)
             
-            if wallHitImage: surface.blit(wallHitImage, (0, 0, surface.get_width(), surface.get_height()))
+        return surface
+    
+    def _removeFromScreen(self, saver:"Saver"):
+        
+        if saver.lastDrawnRect: self._removedRects.append(saver.lastDrawnRect)
+    
+    def _restoreBackground(self, rect:pygame.Rect):
+        
+        if self._target:
             
-        if self.saver.cornerHitted and self.cornerHitEnabled:
+            #scaled positions are rounded, the restored area gets a pixel of margin
+            targetRect = self.getTargetRect(rect).inflate(2, 2)
             
-            surface.blit(self.cornerHitImage.getImage(), (0, 0, surface.get_width(), surface.get_height()))
+            self._target.blit(self._targetBackground, targetRect, targetRect)
             
-        return surface
+            return
+        
+        self._app._root.fill(WHITE, rect)
+        
+        self._app._root.blit(self._root, rect, rect.move(-self.rect.x, -self.rect.y))
     
-    def createImages(self):
+    def renderDirty(self, extraRects:list[pygame.Rect] = []) -> list[pygame.Rect]:
         
-        idleResource = self._sourceFiles["idle"]
+        #erases the savers which moved or changed, draws them and the savers they overlap again and returns the changed areas
+        #board surface itself only changes on resize, which triggers a full redraw
+        dirtyRects = self._removedRects + extraRects
+        self._removedRects = []
         
-        if isResourceIsAnimation(idleResource):
+        redrawnSavers:dict[int, Saver] = {}
+        
+        for saver in self._savers.values():
             
-            self.idleImage = AnimatedImageResource(self.resourcesName, idleResource, self.saver.width, self.saver.height)
+            if not saver.needsRedraw(): continue
             
-        else:
+            redrawnSavers[saver.id] = saver
             
-            self.idleImage = ImageResource(self.resourcesName, idleResource, self.saver.width, self.saver.height)
+            if saver.lastDrawnRect: dirtyRects.append(saver.lastDrawnRect)
+            
+            dirtyRects.append(saver.getDrawRect())
+            
+        if not dirtyRects: return []
         
-        if self.wallHitEnabled:
+        #images with translucent pixels darken when drawn over themselves, so a saver touching a restored area
+        #gets its whole area restored too, which can reach further savers
+        newRects = dirtyRects
+        
+        while newRects:
             
-            wallhitResource = self._sourceFiles["wallhit"]
+            touchedSavers = [
+                saver for saver in self._savers.values() 
+                if saver.id not in redrawnSavers and saver.lastDrawnRect and saver.lastDrawnRect.collidelist(newRects) != -1
+            ]
             
-            if isResourceIsAnimation(wallhitResource):
-                
-                self.wallHitImage = VanishingAnimatedImageResource(self.resourcesName, wallhitResource, self.saver.width, self.saver.height, self.alphaSpeed)
-                
-            else:
+            for saver in touchedSavers:
                 
-                self.wallHitImage = VanishingImageResource(self.resourcesName, wallhitResource, self.saver.width, self.saver.height, self.alphaSpeed)
+                redrawnSavers[saver.id] = saver
             
-        if self.cornerHitEnabled:
+            newRects = [saver.lastDrawnRect for saver in touchedSavers]
             
-            cornerhitResource = self._sourceFiles["cornerhit"]
+            dirtyRects += newRects
+        
+        for rect in dirtyRects:
             
-            if isResourceIsAnimation(cornerhitResource):
-                
-                self.cornerHitImage = AnimatedImageResource(self.resourcesName, cornerhitResource, self.saver.width, self.saver.height)
-                
-            else:
-                
-                self.cornerHitImage = ImageResource(self.resourcesName, cornerhitResource, self.saver.width, self.saver.height)
+            self._restoreBackground(rect)
         
-    def loadResourcesFromContext(self, context):
+        #drawing order stays the order of the board
+        for saver in self._savers.values():
+            
+            if saver.id in redrawnSavers: saver.draw()
         
-        self.resourcesName = context["resourceName"]
+        if self._target:
+            
+            self.presentTarget()
+            
+            #filtered upscale blends a few window pixels around every changed area
+            margin = math.ceil(2 / self.renderScale)
+            
+            dirtyRects = [rect.inflate(margin * 2, margin * 2) for rect in dirtyRects]
+        
+        return dirtyRects
+    
+    def predictCornerHits(self, tickMs:float) -> dict[int, int]:
+        
+        #saver id -> number of the update which hits a corner, see Saver.predictCornerHit
+        time = self._app.getSimulationTime()
+        
+        return {saverId: saver.predictCornerHit(tickMs, time) for saverId, saver in self._savers.items()}
+    
+    def fastForward(self, ticks:int, tickMs:float):
+        
+        time = self._app.getSimulationTime()
+        
+        for saver in self._savers.values():
+            
+            saver.fastForward(ticks, tickMs, time)
+            
+            saver.resetPreviousPosition()
+            
+            #wall clock can't be moved forward, the skipped time is taken as already passed instead
+            #otherwise a corner hit during the skip would pause until the wall clock catches up with it
+            if not self._app.fixedTimestep and saver.lastCornerHitTime is not None: saver.lastCornerHitTime -= ticks * tickMs
+            
+        if self._app.fixedTimestep: self._app.simulationTime += ticks * tickMs
+        
+        self.spatialGrid.update(self._savers.values())
+        
+        self._invalidatePhysics()
+    
+    def resize(self):
+        
+        self.width = self._app.width * BOARDRATIO
+        self.height = self._app.height * BOARDRATIO
+
+        self._root = createSurface((self.width, self.height))
+        
+        self.rect = self._root.get_rect(topleft = (self._app.width * OFFSETRATIO, self._app.height * OFFSETRATIO))
+        
+        self.createRenderTarget()
+        
+        self._focusSurfaces = {}
+        
+        #saver size changes with the board, so the grid gets new cells
+        self.spatialGrid = SpatialGrid(max(getCurrentSaversSize(self)))
+        
+        for saver in self._savers.values():
+            
+            saver.resizeOnBoard()
+            
+            self.spatialGrid.insert(saver)
+            
+        self._invalidatePhysics()
+
+    def updateSavers(self):
+        
+        if self._app.fixedTimestep:
+            
+            for saver in self._savers.values():
+                
+                saver.resetPreviousPosition()
+        
+        if self.focusedOnSaver: return
+        
+        if self.physicsEngine:
+            
+            self.physicsEngine.update(self._savers.values())
+            
+        else:
+            
+            for saver in self._savers.values():
+                
+                saver.update()
+            
+        self.spatialGrid.update(self._savers.values())
+        
+        if self.saverCollisions: self.collideSavers()
+    
+    def collideSavers(self):
+        
+        collided = False
+        
+        for saver, other in self.spatialGrid.getOverlappingPairs():
+            
+            collided = saver.bounceOff(other) or collided
+            
+        #physics engine keeps its own copy of directions, it has to read the new ones
+        if collided: self._invalidatePhysics()
+
+class Saver:
+    
+    #no instance dict, a board can hold 100k savers
+    __slots__ = (
+        "_app", "board", "id", "width", "height", "speed", "resourceManager", "rect", "wallHitted", "focus", 
+        "cornerHitted", "lastCornerHitTime", "lastDrawnRect", "_lastDrawnState", "previousX", "previousY", "directionX", "directionY"
+    )
+    
+    def __init__(self, 
+                 app:App, 
+                 board:Board, 
+                 context, 
+                 x:int, y:int, 
+                 speed:int, 
+                 startDirX:int = 1, 
+                 startDirY:int = 1,
+                 background:bool = False):
+        
+        self._app = app
+        
+        self.board = board
+        
+        self.id:int = None # given by board, stays the same for the whole life of the saver
+        
+        self.width = board.width * IMAGERATIO
+        self.height = board.height * IMAGERATIO
+        
+        self.speed = speed
+        
+        self.resourceManager = SaverResourceManager(self)
+        self.resourceManager.loadResourcesFromContext(context, background)
+        
+        actualX = x
+        if actualX == -1:
+            actualX = (self.board.width / 2) - self.width
+            
+        actualY = y
+        if actualY == -1:
+            actualY = (self.board.height / 2) - self.height
+        
+        self.rect = self.createRect(actualX, actualY)
+        
+        self.wallHitted = False
+
+        self.focus = False
+
+        self.cornerHitted = False
+        self.lastCornerHitTime = None
+        
+        self.lastDrawnRect:pygame.Rect = None
+        self._lastDrawnState:tuple = None
+        
+        #position before the last simulation step, for interpolated drawing with fixed timestep
+        self.previousX = self.rect.x
+        self.previousY = self.rect.y
+        
+        self.directionX = startDirX
+        self.directionY = startDirY
+    
+    def resizeOnBoard(self):
+        
+        self.width = self.board.width * IMAGERATIO
+        self.height = self.board.height * IMAGERATIO
+        
+        self.resourceManager.createImages() #recreate images again
+        
+        self.rect = self.createRect(self.rect.x, self.rect.y)
+        
+        self.resetPreviousPosition()
+    
+    def createRect(self, x:float, y:float) -> pygame.Rect:
+        
+        #same size as an unscaled image of the saver
+        rect = pygame.Rect(0, 0, int(self.width), int(self.height))
+        rect.topleft = (x, y)
+        
+        return rect
+    
+    def getImageSize(self) -> tuple[float, float]:
+        
+        #images are drawn to the board render target, which is smaller than the window below render scale 1
+        #whole pixels, images get scaled to them anyway and small ints aren't allocated per saver
+        return (int(self.width * self.board.renderScale), int(self.height * self.board.renderScale))
+    
+    def resetPreviousPosition(self):
+        
+        self.previousX = self.rect.x
+        self.previousY = self.rect.y
+        
+    def release(self):
+        
+        self.resourceManager.releaseImages()
+    
+    def hitWall(self):
+        
+        self.wallHitted = True
+        
+        self.resourceManager.hitWall()
+    
+    def bounceOff(self, other:"Saver") -> bool:
+        
+        #savers are pushed apart along the axis they overlap less on, returns whether any direction changed
+        overlap = self.rect.clip(other.rect)
+        
+        if overlap.width < overlap.height:
+            
+            direction = 1 if self.rect.centerx >= other.rect.centerx else -1
+            
+            if (self.directionX, other.directionX) == (direction, -direction): return False
+            
+            self.directionX = direction
+            other.directionX = -direction
+            
+        else:
+            
+            direction = 1 if self.rect.centery >= other.rect.centery else -1
+            
+            if (self.directionY, other.directionY) == (direction, -direction): return False
+            
+            self.directionY = direction
+            other.directionY = -direction
+            
+        self.hitWall()
+        other.hitWall()
+        
+        return True
+    
+    def cornerHit(self, time:int = None):
+        
+        self.cornerHitted = True
+        self.wallHitted = False
+        
+        self.lastCornerHitTime = self._app.getSimulationTime() if time is None else time
+        
+    def _getAxes(self) -> tuple["BounceAxis", "BounceAxis"]:
+        
+        #walls are the same ones update checks
+        return (
+            BounceAxis(self.rect.x, self.directionX, self.speed, self.board.rect.x * 2, self.board.width - self.width + self.board.rect.x),
+            BounceAxis(self.rect.y, self.directionY, self.speed, self.board.rect.y * 2, self.board.height - self.height + self.board.rect.y)
+        )
+    
+    def getPauseTicks(self, tickMs:float, time:int, done:int = 0) -> int:
+        
+        #updates until corner pause is over, the update which ends it doesn't move the saver either
+        #update number done + n runs at time + (done + n) * tickMs, the same float stepping compares
+        if not self.cornerHitted: return 0
+        
+        ticks = max(1, int((CORNERHITPAUSE - (time + done * tickMs - self.lastCornerHitTime)) // tickMs) + 1)
+        
+        #with fractional tick length the estimate can be one update off right at the end of the pause
+        while ticks > 1 and isCornerPauseOver(time + (done + ticks - 1) * tickMs - self.lastCornerHitTime): ticks -= 1
+        while not isCornerPauseOver(time + (done + ticks) * tickMs - self.lastCornerHitTime): ticks += 1
+        
+        return ticks
+    
+    def predictCornerHit(self, tickMs:float, time:int = None) -> int:
+        
+        #number of the update (counted from 1) which hits a corner, when updates run every tickMs starting after time
+        #None if saver never hits a corner or is outside of the board, which happens for a few updates after resize
+        if time is None: time = self._app.getSimulationTime()
+        
+        axisX, axisY = self._getAxes()
+        
+        if not (axisX.isRegular() and axisY.isRegular()): return None
+        
+        cornerTick = getFirstCommonHit(axisX, axisY)
+        
+        return None if cornerTick is None else self.getPauseTicks(tickMs, time) + cornerTick
+    
+    def fastForward(self, ticks:int, tickMs:float, time:int = None):
+        
+        #same result as calling update ticks times with time growing by tickMs before every call
+        #each stretch between corner hits is skipped at once, repeating cycles of corner hits are skipped together
+        if time is None: time = self._app.getSimulationTime()
+        
+        done = 0
+        
+        #state right after a corner hit -> update it happened in
+        cornerStates:dict[tuple, int] = {}
+        
+        while done < ticks:
+            
+            if self.cornerHitted:
+                
+                pause = self.getPauseTicks(tickMs, time, done)
+                
+                if done + pause > ticks: return
+                
+                done += pause
+                
+                self.cornerHitted = False
+                
+                continue
+            
+            axisX, axisY = self._getAxes()
+            
+            #saver outside of the board, stepping until it bounces back in
+            if not (axisX.isRegular() and axisY.isRegular()):
+                
+                done += 1
+                
+                self.update(time + done * tickMs)
+                
+                continue
+            
+            cornerTick = getFirstCommonHit(axisX, axisY)
+            
+            if cornerTick is None or done + cornerTick > ticks:
+                
+                self.rect.x, self.directionX, xHitted = axisX.advance(ticks - done)
+                self.rect.y, self.directionY, yHitted = axisY.advance(ticks - done)
+                
+                if xHitted or yHitted: self.hitWall()
+                
+                return
+            
+            self.rect.x, self.directionX, _ = axisX.advance(cornerTick)
+            self.rect.y, self.directionY, _ = axisY.advance(cornerTick)
+            
+            done += cornerTick
+            
+            state = (self.rect.x, self.rect.y, self.directionX, self.directionY)
+            
+            if state in cornerStates:
+                
+                cycle = done - cornerStates[state]
+                
+                done += (ticks - done) // cycle * cycle
+                
+            cornerStates[state] = done
+            
+            self.hitWall()
+            self.cornerHit(time + done * tickMs)
+    
+    def update(self, time:int = None):
+        
+        if self.cornerHitted:
+            
+            if isCornerPauseOver((self._app.getSimulationTime() if time is None else time) - self.lastCornerHitTime):
+                
+                self.cornerHitted = False
+                
+            return
+        
+        self.rect.x += self.speed * self.directionX
+        self.rect.y += self.speed * self.directionY
+        
+        xHitted = False
+        
+        if self.rect.x >= self.board.width - self.width + self.board.rect.x:
+            
+            self.directionX = -self.directionX
+            
+            self.rect.x = (self.board.width - self.width + self.board.rect.x) - 1
+            
+            self.hitWall()
+            
+            xHitted = True
+            
+        elif self.rect.x <= self.board.rect.x * 2:
+            
+            self.directionX = -self.directionX
+            
+            self.rect.x = (self.board.rect.x * 2) + 1
+            
+            self.hitWall()
+            
+            xHitted = True
+            
+        if self.rect.y >= self.board.height - self.height + self.board.rect.y:
+            
+            self.directionY = -self.directionY
+            
+            self.rect.y = (self.board.height - self.height + self.board.rect.y) - 1
+            
+            self.hitWall()
+            
+            if xHitted:
+                
+                self.cornerHit(time)
+                
+            else:
+                
+                self.hitWall()  
+                
+        elif self.rect.y <= self.board.rect.y * 2:
+            
+            self.directionY = -self.directionY
+            
+            self.rect.y = (self.board.rect.y * 2) + 1
+            
+            if xHitted:
+                
+                self.cornerHit(time)
+                
+            else:
+                
+                self.hitWall()  
+
+    def getDrawRect(self) -> pygame.Rect:
+        
+        interpolation = self._app.interpolation
+        
+        if interpolation is None or (self.previousX == self.rect.x and self.previousY == self.rect.y): return self.rect
+        
+        return self.rect.move(
+            roundCoordinate((self.previousX - self.rect.x) * (1 - interpolation)),
+            roundCoordinate((self.previousY - self.rect.y) * (1 - interpolation))
+        )
+    
+    def getDrawState(self) -> tuple:
+        
+        #one flat tuple, every saver keeps the last one
+        return (*self.getDrawRect(), self.focus, self.wallHitted, self.cornerHitted, *self.resourceManager.getDrawState())
+    
+    def needsRedraw(self) -> bool:
+        
+        return self._lastDrawnState != self.getDrawState() or self.resourceManager.isAnimating()
+    
+    def draw(self):
+        
+        rect = self.getDrawRect()
+        
+        self.lastDrawnRect = rect.copy()
+        self._lastDrawnState = self.getDrawState()
+        
+        rect = self.board.getTargetRect(rect)
+        
+        if self.focus:
+            
+            self.board.draw(self.board.getFocusSurface(rect.size), rect)
+            
+        else:
+            
+            self.resourceManager.draw(rect)
+       
+class GuiElement:
+    
+    def __init__(self, 
+                 app:App, 
+                 indexInColumn:int, 
+                 width:float, 
+                 height:float, 
+                 x:int, y:int, 
+                 text:str = "", 
+                 bgColor:tuple[int, int, int] = WHITE, 
+                 textColor:tuple[int, int, int] = BLACK):
+        
+        self.app = app
+        
+        self.indexInColumn = indexInColumn
+        
+        self.width = width
+        self.height = height
+        
+        self.text = text
+        
+        self.surface = createSurface((self.width, self.height))
+        
+        self.rect = self.surface.get_rect(topleft = (x, y))
+        
+        self.bgColor = bgColor
+        self.textColor = textColor
+        
+        self._lastDrawnState:tuple = None
+        
+        #rendered text is reused until text, color or size changes
+        self._textSurface:pygame.Surface = None
+        self._textSurfaceKey:tuple = None
+        
+        self._surfaceColor:tuple[int, int, int] = None
+    
+    def getDrawState(self) -> tuple:
+        
+        return (self.text, self.bgColor, self.textColor, tuple(self.rect))
+    
+    def getDrawnRect(self) -> pygame.Rect:
+        
+        return self.rect
+    
+    def needsRedraw(self) -> bool:
+        
+        return self._lastDrawnState != self.getDrawState()
+    
+    def renderText(self) -> pygame.Surface:
+        
+        key = (self.text, self.textColor, self.width, self.height)
+        
+        if self._textSurfaceKey != key:
+            
+            TEXTCACHESTATISTICS.misses += 1
+            
+            SURFACEALLOCATIONS.count()
+            
+            self._textSurface = resizeImage(SANS.render(self.text, True, self.textColor), self.width, self.height)
+            self._textSurfaceKey = key
+            
+        else:
+            
+            TEXTCACHESTATISTICS.hits += 1
+            
+        return self._textSurface
+    
+    def fillSurface(self, color:tuple[int, int, int]):
+        
+        if self._surfaceColor != color:
+            
+            self.surface.fill(color)
+            
+            self._surfaceColor = color
+    
+    def draw(self):
+        
+        self._lastDrawnState = self.getDrawState()
+        
+        self.fillSurface(self.bgColor)
+        
+        self.app.draw(self.surface, self.rect)
+        
+        if self.text != "": self.app.draw(self.renderText(), self.rect)
+    
+    def resize(self):
+        
+        self.width = self.app.width * GUIWIDTHRATIO
+        self.height = self.app.height * GUIHEIGHTRATIO
+        
+        self.surface = createSurface((self.width, self.height))
+        self._surfaceColor = None
+        
+        self.rect = self.surface.get_rect(topleft = (
+           self.app.width * GUIXRATIO, 
+           (self.app.height * OFFSETRATIO) + ((self.app.height * GUIBETWEENRATIO) * self.indexInColumn) 
+        ))
+      
+    def subscribeEvents(self, router:"EventRouter"):
+        
+        pass
+
+class Button(GuiElement):
+    
+    def __init__(self, app:App, indexInColumn:int, width:float, height:float, x:int, y:int, text="", bgColor:tuple[int,int,int]=WHITE, textColor:tuple[int,int,int]=BLACK, command=None, args=None):
+        super().__init__(app, indexInColumn, width, height, x, y, text, bgColor, textColor)
+        
+        self.command = command
+        self.args = args
+        
+    def subscribeEvents(self, router:"EventRouter"):
+        
+        router.subscribeArea(pygame.MOUSEBUTTONDOWN, lambda: self.rect, self.onClick)
+        
+    def onClick(self, event:pygame.event.Event):
+        
+        if self.command: 
+            
+            if self.args:
+                
+                self.command(self.args)
+                
+            else:
+                
+                self.command()
+
+class InputField(GuiElement):
+
+    def __init__(self, 
+                 app:App, 
+                 indexInColumn:int, 
+                 width:float, 
+                 height:float,
+                 x:int, y:int,
+                 caption:str = "",
+                 text:str = "",
+                 bgColor:tuple[int, int, int] = WHITE, 
+                 textColor:tuple[int, int, int] = BLACK):
+
+        super().__init__(app, indexInColumn, width, height, x, y, text, bgColor, textColor)
+
+        self.caption = caption
+        
+        self.captionSurface = self.renderCaption()
+        self.captionRect = self.captionSurface.get_rect(topleft=(self.rect.x, self.rect.y + (self.captionSurface.get_height() / 2) + 4))
+
+        self.focused = False
+
+    def clearLastSymbol(self):
+        
+        self.text = self.text[0:len(self.text) - 1]
+
+    def renderCaption(self):
+        
+        SURFACEALLOCATIONS.count()
+        
+        return resizeImage(SANS.render(self.caption, True, self.textColor), self.width, self.height)
+
+    def resize(self):
+        
+        super().resize()
+        
+        self.captionSurface = self.renderCaption()
+        
+        self.captionRect = self.captionSurface.get_rect(topleft=(self.rect.x, self.rect.y + (self.captionSurface.get_height() / 2) + 4))
+
+    def getDrawState(self) -> tuple:
+        
+        return super().getDrawState() + (self.focused, tuple(self.captionRect))
+    
+    def getDrawnRect(self) -> pygame.Rect:
+        
+        return self.rect.union(self.captionRect)
+
+    def draw(self):
+        
+        self._lastDrawnState = self.getDrawState()
+        
+        self.fillSurface(RED if self.focused else self.bgColor)
+            
+        self.app.draw(self.surface, self.rect)
+        
+        if self.text != "": self.app.draw(self.renderText(), self.rect)
+        
+        self.app.draw(self.captionSurface, self.captionRect)
+
+    def subscribeEvents(self, router:"EventRouter"):
+        
+        #clicks outside take the focus away, so every click is needed
+        router.subscribe(pygame.MOUSEBUTTONDOWN, self.onMouseButtonDown)
+        router.subscribe(pygame.KEYDOWN, self.onKeyDown)
+    
+    def onMouseButtonDown(self, event:pygame.event.Event):
+        
+        self.focused = self.rect.collidepoint(event.pos)
+    
+    def onKeyDown(self, event:pygame.event.Event):
+        
+        if self.focused and event.key >= 48 and event.key <= 57 and len(self.text) < 4: #only numbers
+            
+            self.text += chr(event.key)
+            
+        elif event.key == 8:
+            
+            self.clearLastSymbol()
+
+class ImageResource:
+    
+    __slots__ = ("resourceName", "sourceFile", "width", "height", "background", "_imageEntry")
+    
+    #fading images get their own cached surfaces because their alpha is changed right before every blit
+    fading = False
+    
+    def __init__(self, resourceName:str, file:str, width:float, height:float, background:bool = False):
+        
+        self.resourceName = resourceName
+        
+        self.sourceFile = file
+        
+        self.width = width
+        self.height = height
+        
+        self.background = background
+        
+        self._imageEntry:ImageCacheEntry = None
+        self.createImage()
+    
+    @property
+    def image(self) -> pygame.Surface:
+        
+        if self._imageEntry.value is None: return getPlaceholder((int(self.width), int(self.height)))
+        
+        return self._imageEntry.value
+    
+    def isReady(self) -> bool:
+        
+        return self._imageEntry.value is not None
+        
+    def createImage(self):
+        
+        self._imageEntry = acquireScaledImage(self.sourceFile, self.width, self.height, self.fading, self.background)
+    
+    def release(self):
+        
+        if self._imageEntry:
+            
+            IMAGECACHE.release(self._imageEntry)
+            
+            self._imageEntry = None
+        
+    def getImage(self):
+        
+        #shared with other savers, must not be modified
+        return self.image
+
+class VanishingImageResource(ImageResource):
+    
+    __slots__ = ("alphaSpeed", "_fadeTable", "fadeStep")
+    
+    fading = True
+    
+    def __init__(self, resourceName:str, file:str, width:float, height:float, alphaSpeed:int, background:bool = False):
+        
+        super().__init__(resourceName, file, width, height, background)
+        
+        self.alphaSpeed = alphaSpeed
+        
+        self._fadeTable = getFadeTable(alphaSpeed)
+        self.fadeStep = len(self._fadeTable)
+    
+    def restartFade(self):
+        
+        self.fadeStep = 0
+    
+    def getAlpha(self) -> int:
+        
+        return self._fadeTable[self.fadeStep] if self.fadeStep < len(self._fadeTable) else 0
+    
+    def getImage(self):
+        
+        #overlay is skipped while loading, placeholder is shared and its alpha must stay untouched
+        if self.fadeStep >= len(self._fadeTable) or not self.isReady():
+            
+            return None
+        
+        #no copy, alpha of the shared fading surface is only valid until the next getImage
+        self.image.set_alpha(self._fadeTable[self.fadeStep])
+        
+        if self.alphaSpeed > 0: self.fadeStep += 1
+        
+        return self.image
+
+class AnimatedImageResource(ImageResource):
+    
+    __slots__ = ("_framesEntry", "streaming", "currentFrameIndex", "sharedClock", "phaseOffset")
+    
+    def __init__(self, resourceName:str, file:str, width:float, height:float, background:bool = False):
+        
+        super().__init__(resourceName, file, width, height, background)
+        
+        self._framesEntry:ImageCacheEntry = None
+        
+        self.streaming = STREAMINGANIMATIONS
+        
+        self.currentFrameIndex = 0
+        
+        #with shared clock frame is picked from clock tick, phase offset shifts it for this image only
+        self.sharedClock = SHAREDANIMATIONCLOCK
+        self.phaseOffset = -ANIMATIONCLOCK.tick
+        
+        self.loadAnimation()
+    
+    @property
+    def _frames(self) -> list[pygame.Surface]:
+        
+        if self._framesEntry.value is None: return [self.image]
+        
+        return self._framesEntry.value
+    
+    def isReady(self) -> bool:
+        
+        return super().isReady() and self._framesEntry.value is not None
+    
+    def loadAnimation(self):
+        
+        if self.streaming:
+            
+            frameCache = FRAMECACHES.get(self.resourceName, FRAMECACHE)
+            
+            self._framesEntry = acquireAnimationStream(self.sourceFile, self.width, self.height, frameCache, self.fading)
+            
+        else:
+            
+            self._framesEntry = acquireScaledFrames(self.sourceFile, self.width, self.height, self.fading, self.background)
+    
+    def getFrameCount(self) -> int:
+        
+        if self.streaming: return self._framesEntry.value.frameCount
+        
+        return len(self._frames)
+    
+    def getFrame(self, index:int) -> pygame.Surface:
+        
+        if self.streaming: return self._framesEntry.value.getFrame(index)
+        
+        return self._frames[index]
+    
+    def release(self):
+        
+        super().release()
+        
+        if self._framesEntry:
+            
+            IMAGECACHE.release(self._framesEntry)
+            
+            self._framesEntry = None
+        
+    def resetAnimation(self):
+        
+        self.currentFrameIndex = 0
+        self.phaseOffset = -ANIMATIONCLOCK.tick
+    
+    def _nextFrame(self) -> pygame.Surface:
+        
+        if not self.isReady(): return self.image
+        
+        if self.sharedClock: return self.getFrame((ANIMATIONCLOCK.tick + self.phaseOffset) % self.getFrameCount())
+        
+        frame = self.getFrame(self.currentFrameIndex)
+        
+        self.currentFrameIndex += 1
+        
+        if self.currentFrameIndex >= self.getFrameCount():
+            
+            self.currentFrameIndex = 0
+            
+        return frame
+    
+    def getImage(self) -> pygame.Surface:
+        
+        #shared with other savers, must not be modified
+        return self._nextFrame()
+
+class VanishingAnimatedImageResource(AnimatedImageResource):
+    
+    __slots__ = ("alphaSpeed", "_fadeTable", "fadeStep")
+    
+    fading = True
+    
+    def __init__(self, resourceName:str, file:str, width:float, height:float, alphaSpeed:int, background:bool = False):
+        
+        super().__init__(resourceName, file, width, height, background)
+        
+        self.alphaSpeed = alphaSpeed
+        
+        self._fadeTable = getFadeTable(alphaSpeed)
+        self.fadeStep = len(self._fadeTable)
+    
+    def restartFade(self):
+        
+        self.fadeStep = 0
+    
+    def getAlpha(self) -> int:
+        
+        return self._fadeTable[self.fadeStep] if self.fadeStep < len(self._fadeTable) else 0
+        
+    def getImage(self) -> pygame.Surface:
+        
+        if self.fadeStep >= len(self._fadeTable) or not self.isReady():
+            
+            return None
+        
+        #no copy, alpha of the shared fading frame is only valid until the next getImage
+        frame = self._nextFrame()
+        
+        frame.set_alpha(self._fadeTable[self.fadeStep])
+        
+        if self.alphaSpeed > 0: self.fadeStep += 1
+        
+        return frame
+        
+class SaverResourceHandle:
+    
+    #everything savers of one resource and image size have in common, shared instead of copied into every saver
+    __slots__ = ("key", "context", "resourcesName", "animationReset", "wallHitEnabled", "cornerHitEnabled", "sourceFiles", "idleImage", "cornerHitImage", "refCount")
+    
+    def __init__(self, key:tuple, context:dict, width:float, height:float, background:bool = False):
+        
+        self.key = key
+        self.context = context
+        
+        self.resourcesName = context["resourceName"]
+        
+        self.animationReset = context["resetAnimation"]
+        
+        self.wallHitEnabled = context["wallhitenabled"]
+        
+        self.cornerHitEnabled = context["cornerhitenabled"]
+        
+        self.sourceFiles = {"idle": generatePathToImageResource(self.resourcesName, context["idle"])}
+        
+        if self.wallHitEnabled:
+            
+            self.sourceFiles["wallhit"] = generatePathToImageResource(self.resourcesName, context["wallhit"])
+            
+        if self.cornerHitEnabled:
+            
+            self.sourceFiles["cornerhit"] = generatePathToImageResource(self.resourcesName, context["cornerhit"])
+        
+        #static images have no state of their own, so all savers draw the same instance
+        #animated and fading images keep a frame index or fade step, every saver creates its own
+        self.idleImage = self.createStaticImage("idle", width, height, background)
+        self.cornerHitImage = self.createStaticImage("cornerhit", width, height, background)
+        
+        self.refCount = 0
+    
+    def createStaticImage(self, name:str, width:float, height:float, background:bool) -> ImageResource:
+        
+        sourceFile = self.sourceFiles.get(name)
+        
+        if sourceFile is None or isResourceIsAnimation(sourceFile): return None
+        
+        return ImageResource(self.resourcesName, sourceFile, width, height, background)
+    
+    def isShared(self, image:ImageResource) -> bool:
+        
+        return image is self.idleImage or image is self.cornerHitImage
+    
+    def release(self):
+        
+        self.refCount -= 1
+        
+        if self.refCount <= 0 and SAVERRESOURCEHANDLES.get(self.key) is self:
+            
+            del SAVERRESOURCEHANDLES[self.key]
+            
+            for image in (self.idleImage, self.cornerHitImage):
+                
+                if image: image.release()
+
+#(resource name, image width, image height) -> handle
+SAVERRESOURCEHANDLES:dict[tuple, SaverResourceHandle] = {}
+
+class SaverResourceManager:
+    
+    __slots__ = ("saver", "alphaSpeed", "handle", "idleImage", "wallHitImage", "cornerHitImage")
+    
+    def __init__(self, saver:Saver):
+        
+        self.saver = saver
+        
+        self.alphaSpeed = int(self.saver.speed * 1.2)
+        
+        self.handle:SaverResourceHandle = None
+        
+        self.idleImage = None
+        self.wallHitImage = None
+        self.cornerHitImage = None
+    
+    @property
+    def resourcesName(self) -> str:
+        
+        return self.handle.resourcesName
+    
+    @property
+    def animationReset(self) -> bool:
+        
+        return self.handle.animationReset
+    
+    @property
+    def wallHitEnabled(self) -> bool:
+        
+        return self.handle.wallHitEnabled
+    
+    @property
+    def cornerHitEnabled(self) -> bool:
+        
+        return self.handle.cornerHitEnabled
+    
+    def hitWall(self):
+        
+        if (self.wallHitEnabled):
+            
+            self.wallHitImage.restartFade()
+            
+            if self.animationReset and self.wallHitImage.__class__ is VanishingAnimatedImageResource:
+                
+                self.wallHitImage.resetAnimation()
+    
+    def getDrawState(self) -> tuple[int, bool]:
+        
+        #fade step of the wallhit overlay which will be drawn next and whether the placeholder is still shown
+        #not the alpha, it stays at 255 for the first steps and a saver standing still would never fade out
+        wallHitStep = None
+        
+        if self.saver.wallHitted and self.wallHitEnabled:
+            
+            wallHitStep = self.wallHitImage.fadeStep
+        
+        return (wallHitStep, self.isReady())
+    
+    def isReady(self) -> bool:
+        
+        return all(image.isReady() for image in (self.idleImage, self.wallHitImage, self.cornerHitImage) if image)
+    
+    def isAnimating(self) -> bool:
+        
+        #animated images change every frame even if the saver stands still
+        if isinstance(self.idleImage, AnimatedImageResource): return True
+        
+        if self.saver.wallHitted and self.wallHitEnabled and isinstance(self.wallHitImage, AnimatedImageResource):
+            
+            return self.wallHitImage.getAlpha() > 0
+        
+        return self.saver.cornerHitted and self.cornerHitEnabled and isinstance(self.cornerHitImage, AnimatedImageResource)
+    
+    def draw(self, rect:pygame.Rect):
+        
+        #cached surfaces are blitted straight to the window or board render target, overlays have the same size as the idle image
+        board = self.saver.board
+        
+        board.draw(self.idleImage.getImage(), rect)
+        
+        if self.saver.wallHitted and self.wallHitEnabled:
+            
+            wallHitImage = self.wallHitImage.getImage()
+            
+            if wallHitImage: board.draw(wallHitImage, rect)
+            
+        if self.saver.cornerHitted and self.cornerHitEnabled:
+            
+            board.draw(self.cornerHitImage.getImage(), rect)
+    
+    def releaseImages(self):
+        
+        self._releaseImages(self.handle, (self.idleImage, self.wallHitImage, self.cornerHitImage))
+    
+    def _releaseImages(self, handle:SaverResourceHandle, images:tuple):
+        
+        if handle is None: return
+        
+        for image in images:
+            
+            #shared images are released with the handle
+            if image and not handle.isShared(image): image.release()
+            
+        handle.release()
+    
+    def createImages(self, background:bool = False, context:dict = None):
+        
+        #keep old images until new ones are acquired so shared cache entries are not evicted in between
+        oldHandle = self.handle
+        oldImages = (self.idleImage, self.wallHitImage, self.cornerHitImage)
+        
+        width, height = self.saver.getImageSize()
+        
+        #on resize the saver keeps its resource, only the size changes
+        self.handle = acquireSaverResourceHandle(context or oldHandle.context, width, height, background)
+        
+        sourceFiles = self.handle.sourceFiles
+        
+        self.idleImage = self.handle.idleImage or AnimatedImageResource(self.resourcesName, sourceFiles["idle"], width, height, background)
+        
+        self.wallHitImage = None
+        self.cornerHitImage = None
+        
+        if self.wallHitEnabled:
+            
+            wallhitResource = sourceFiles["wallhit"]
+            
+            if isResourceIsAnimation(wallhitResource):
+                
+                self.wallHitImage = VanishingAnimatedImageResource(self.resourcesName, wallhitResource, width, height, self.alphaSpeed, background)
+                
+            else:
+                
+                self.wallHitImage = VanishingImageResource(self.resourcesName, wallhitResource, width, height, self.alphaSpeed, background)
+            
+        if self.cornerHitEnabled:
+            
+            self.cornerHitImage = self.handle.cornerHitImage or AnimatedImageResource(self.resourcesName, sourceFiles["cornerhit"], width, height, background)
+        
+        self._releaseImages(oldHandle, oldImages)
+        
+    def loadResourcesFromContext(self, context, background:bool = False):
+        
+        self.createImages(background, context)
+
+class ResourceManager:
+    
+    def __init__(self):
+        
+        self.mainDirectory = RESOURCESDIRECTORY
+        
+        self._resources:list[dict] = []
+        
+        #decoded source images kept for the whole app lifetime
+        self._predecodedEntries:list[ImageCacheEntry] = []
+    
+    def getRandomResource(self) -> dict:
+        
+        return random.choice(self._resources)
+    
+    def getAllResources(self) -> list[dict]:
+        
+        return self._resources
+    
+    def getResourceByName(self, name) -> dict:
+        
+        for resource in self._resources:
+            
+            if resource["resourceName"] == name:
+                
+                return resource
+            
+        return None
+    
+    def loadResourcesFromMainDirectory(self, parallel:bool = False, progressCallback = None):
+        
+        #progressCallback(done, total, description) is called on the main thread after every step
+        directories = [os.path.join(self.mainDirectory, file) for file in os.listdir(self.mainDirectory)]
+        directories = [directory for directory in directories if os.path.isdir(directory)]
+        
+        if not parallel:
+            
+            for directory in directories:
+                
+                self.loadResourceFromDirectory(directory)
+                
+            return
+        
+        #checks are mostly file system calls, threads are enough for them and keep the original order
+        with concurrent.futures.ThreadPoolExecutor(STARTUPWORKERS) as pool:
+            
+            for index, context in enumerate(pool.map(self.readResourceDirectory, directories)):
+                
+                if context: self._resources.append(context)
+                
+                if progressCallback: progressCallback(index + 1, len(directories), f"scanned \"{os.path.basename(directories[index])}\"")
+                
+        self.predecodeResources(progressCallback)
+    
+    def predecodeResources(self, progressCallback = None):
+        
+        #decoding is cpu bound, so every image is decoded in its own process and only raw pixels come back
+        files = []
+        
+        for context in self._resources:
+            
+            for kind, enabled in (("idle", True), ("wallhit", context["wallhitenabled"]), ("cornerhit", context["cornerhitenabled"])):
+                
+                file = generatePathToImageResource(context["resourceName"], context[kind]) if enabled else None
+                
+                if file and file not in files: files.append(file)
+        
+        try:
+            
+            with concurrent.futures.ProcessPoolExecutor(STARTUPWORKERS) as pool:
+                
+                jobs = {pool.submit(decodeSourceFile, file): file for file in files}
+                
+                for index, job in enumerate(concurrent.futures.as_completed(jobs)):
+                    
+                    file = jobs[job]
+                    
+                    self._predecodedEntries.append(registerDecodedSource(file, job.result()))
+                    
+                    if progressCallback: progressCallback(index + 1, len(files), f"decoded \"{file}\"")
+                    
+        except (OSError, concurrent.futures.BrokenExecutor) as error:
+            
+            #images are still decoded on first use, just not in advance
+            print(f"Resource pre-decoding failed: {error}")
+                
+    def loadResourceFromDirectory(self, directory:str):
+        
+        context = self.readResourceDirectory(directory)
+        
+        if context: self._resources.append(context)
+    
+    def readResourceDirectory(self, directory:str) -> dict:
+        
+        resourceDirectory = os.path.basename(directory)
+        
+        print(f"Loading resource: \"{resourceDirectory}\"")
+        
+        contextPath = os.path.join(directory, "context.json")
+        
+        #check if context exist
+        if not os.path.exists(contextPath):
+            
+            print(f"Resource \"{resourceDirectory}\" has no context, skipping")
+            return
+        
+        #create context
+        context = {}
+        
+        with open(contextPath) as contextFile:
+            
+            rawContextData = json.load(contextFile)
+            
+            try:
+               
+                resourceName = rawContextData["resourceName"]
+                if resourceName == "$asDirectory": #marker for fast naming
+                    
+                    context["resourceName"] = resourceDirectory
+                    
+                else:
+                    
+                    context["resourceName"] = resourceName
+                   
+                resourceIdleImage = rawContextData["idle"]
+                if not os.path.exists(os.path.join(directory, resourceIdleImage)):
+                    print(f"Resource \"{resourceDirectory}\" has no idle image, which is required, skipping")
+                    return
+
+                context["idle"] = resourceIdleImage
+                
+                resourceWallHitImage = rawContextData["wallhit"]
+                if not os.path.exists(os.path.join(directory, resourceWallHitImage)):
+                    
+                    print(f"Resource \"{resourceDirectory}\" has no wallhit image, which is optional")
+                    
+                    context["wallhitenabled"] = False
+                    
+                else:
+                    
+                    context["wallhitenabled"] = True
+                    
+                    context["wallhit"] = resourceWallHitImage
+                    
+                resourceCornerHitImage = rawContextData["cornerhit"]
+                if not os.path.exists(os.path.join(directory, resourceCornerHitImage)):
+                    
+                    print(f"Resource \"{resourceDirectory}\" has no cornerhit image, which is optional")
+                    
+                    context["cornerhitenabled"] = False
+                    
+                else:
+                    
+                    context["cornerhitenabled"] = True
+                    
+                    context["cornerhit"] = resourceCornerHitImage
+                
+                animationReset = False
+                
+                try:
+                    
+                    animationReset = rawContextData["resetAnimation"]
+                    
+                except KeyError:
+                    
+                    print(f"Resource \"{resourceDirectory}\" has no attribute \"animationReset\", automatically set to false")
+                    
+                context["resetAnimation"] = animationReset
+                
+                #optional, streamed animations of this resource get their own frame cache
+                if "frameCacheBudget" in rawContextData:
+                    
+                    FRAMECACHES[context["resourceName"]] = FrameCache(rawContextData["frameCacheBudget"] * 1024 * 1024)
+                
+            except KeyError: 
+                
+                print(f"Resource \"{resourceDirectory}\" context is missing required info, check help.txt")
+                return
+        
+        print(f"Resource: \"{resourceDirectory}\" was added successfully!")
+        
+        return context
+
+#motion of a saver along one axis in closed form, as Saver.update moves it
+#after the first wall hit the saver alternates between two stretches with fixed number of updates,
+#from the bounce point of one wall to the other wall and back, so every hit is on one of two arithmetic progressions
+class BounceAxis:
+    
+    def __init__(self, position:int, direction:int, speed:int, low:float, high:float):
+        
+        self.position = position
+        self.direction = direction
+        self.speed = speed
+        
+        #saver hits a wall when its position is at or behind it
+        self.low = low
+        self.high = high
+        
+        if not self.isRegular(): return
+        
+        #positions a saver is put to after hitting the wall in its direction and the opposite one
+        self.firstBounce = roundCoordinate(high - 1) if direction > 0 else roundCoordinate(low + 1)
+        self.secondBounce = roundCoordinate(low + 1) if direction > 0 else roundCoordinate(high - 1)
+        
+        self.firstHit = self.getTicksToHit(position, direction)
+        
+        self.firstStretch = self.getTicksToHit(self.firstBounce, -direction)
+        self.secondStretch = self.getTicksToHit(self.secondBounce, direction)
+        
+        self.period = self.firstStretch + self.secondStretch
+    
+    def isRegular(self) -> bool:
+        
+        #outside of the walls update can bounce savers the other way, that is left to stepping
+        return self.speed > 0 and self.low < self.position < self.high
+    
+    def _isHit(self, position:int, direction:int) -> bool:
+        
+        return position >= self.high if direction > 0 else position <= self.low
+    
+    def getTicksToHit(self, position:int, direction:int) -> int:
+        
+        distance = self.high - position if direction > 0 else position - self.low
+        
+        ticks = max(1, math.ceil(distance / self.speed))
+        
+        #walls are floats, the division is corrected with the exact comparison update does
+        while ticks > 1 and self._isHit(position + (ticks - 1) * self.speed * direction, direction):
+            
+            ticks -= 1
+            
+        while not self._isHit(position + ticks * self.speed * direction, direction):
+            
+            ticks += 1
+            
+        return ticks
+    
+    def getHitProgressions(self) -> tuple[tuple[int, int], tuple[int, int]]:
+        
+        #(first update, period) of hits on the wall in starting direction and on the opposite one
+        return ((self.firstHit, self.period), (self.firstHit + self.firstStretch, self.period))
+    
+    def advance(self, ticks:int) -> tuple[int, int, bool]:
+        
+        #position and direction after ticks updates and whether any wall was hit
+        if ticks < self.firstHit: return (self.position + ticks * self.speed * self.direction, self.direction, False)
+        
+        remainder = (ticks - self.firstHit) % self.period
+        
+        if remainder < self.firstStretch: return (self.firstBounce - remainder * self.speed * self.direction, -self.direction, True)
+        
+        return (self.secondBounce + (remainder - self.firstStretch) * self.speed * self.direction, self.direction, True)
+
+def getFirstCommonHit(axisX:BounceAxis, axisY:BounceAxis) -> int:
+    
+    #corner hit is an update hitting walls on both axes
+    cornerTicks = [
+        getFirstCommonTerm(startX, periodX, startY, periodY)
+        for startX, periodX in axisX.getHitProgressions()
+        for startY, periodY in axisY.getHitProgressions()
+    ]
+    
+    return min((tick for tick in cornerTicks if tick is not None), default=None)
+
+def getFirstCommonTerm(startA:int, periodA:int, startB:int, periodB:int) -> int:
+    
+    #smallest number in both progressions start + k * period, k >= 0, by chinese remainder theorem
+    divisor = math.gcd(periodA, periodB)
+    
+    if (startB - startA) % divisor: return None
+    
+    reducedA = periodA // divisor
+    reducedB = periodB // divisor
+    
+    #solution modulo reducedB of startA + periodA * k == startB (mod periodB)
+    k = (startB - startA) // divisor * pow(reducedA, -1, reducedB) % reducedB if reducedB > 1 else 0
+    
+    term = startA + periodA * k
+    
+    leastCommonMultiple = reducedA * periodB
+    
+    if term < startB: term += (startB - term + leastCommonMultiple - 1) // leastCommonMultiple * leastCommonMultiple
+    
+    return term
+
+#uniform grid over saver rects, cells are at least one saver big
+#saver is kept in the cell of its top left corner and the three cells right and below it, which covers the whole rect
+#so savers are moved between cells only when their corner crosses a cell border, which most frames it doesn't
+class SpatialGrid:
+    
+    def __init__(self, cellSize:float):
+        
+        self.cellSize = max(1, int(cellSize))
+        
+        #cell -> savers overlapping it by id
+        self._cells:dict[tuple[int, int], dict[int, Saver]] = {}
+        
+        #saver id -> cell of its top left corner
+        self._saverCells:dict[int, tuple[int, int]] = {}
+    
+    def _getCell(self, rect:pygame.Rect) -> tuple[int, int]:
+        
+        return (rect.x // self.cellSize, rect.y // self.cellSize)
+    
+    def _getCells(self, cell:tuple[int, int]) -> tuple[tuple[int, int], ...]:
+        
+        column, row = cell
+        
+        return ((column, row), (column + 1, row), (column, row + 1), (column + 1, row + 1))
+    
+    def clear(self):
+        
+        self._cells = {}
+        self._saverCells = {}
+    
+    def insert(self, saver:Saver):
+        
+        anchor = self._getCell(saver.rect)
+        
+        self._saverCells[saver.id] = anchor
+        
+        for cell in self._getCells(anchor):
+            
+            self._cells.setdefault(cell, {})[saver.id] = saver
+    
+    def remove(self, saver:Saver):
+        
+        anchor = self._saverCells.pop(saver.id, None)
+        
+        if anchor is None: return
+        
+        for cell in self._getCells(anchor):
+            
+            cellSavers = self._cells[cell]
+            
+            del cellSavers[saver.id]
+            
+            if not cellSavers: del self._cells[cell]
+    
+    def update(self, savers):
+        
+        #called for every saver every frame, so the check is inlined
+        size = self.cellSize
+        saverCells = self._saverCells
+        
+        for saver in savers:
+            
+            rect = saver.rect
+            
+            if saverCells.get(saver.id) == (rect.x // size, rect.y // size): continue
+            
+            self.remove(saver)
+            self.insert(saver)
+    
+    def getOverlappingPairs(self) -> list[tuple[Saver, Saver]]:
+        
+        #broad phase, only savers sharing a cell are compared
+        pairs = []
+        
+        saverCells = self._saverCells
+        
+        for cell, cellSavers in self._cells.items():
+            
+            if len(cellSavers) < 2: continue
+            
+            savers = list(cellSavers.values())
+            
+            for index, saver in enumerate(savers):
+                
+                column, row = saverCells[saver.id]
+                rect = saver.rect
+                
+                for other in savers[index + 1:]:
+                    
+                    if not rect.colliderect(other.rect): continue
+                    
+                    otherColumn, otherRow = saverCells[other.id]
+                    
+                    #overlapping savers share up to four cells, the pair is reported only from the one with the largest column and row
+                    if (max(column, otherColumn), max(row, otherRow)) == cell: pairs.append((saver, other))
+                    
+        return pairs
+    
+    def queryPoint(self, position:tuple[int, int]) -> Saver:
+        
+        cellSavers = self._cells.get((position[0] // self.cellSize, position[1] // self.cellSize))
+        
+        if not cellSavers: return None
+        
+        #savers are drawn in id order, so the one with the highest id is on top
+        return max((saver for saver in cellSavers.values() if saver.rect.collidepoint(position)), key=lambda saver: saver.id, default=None)
+
+#struct-of-arrays copy of every saver's motion state, advanced with batched numpy operations
+#produces the same trajectories as Saver.update, wall and corner hits are returned as index arrays
+class SaverPhysicsEngine:
+    
+    def __init__(self, board:Board):
+        
+        self.board = board
+        
+        self._savers:list[Saver] = None
+    
+    def invalidate(self):
+        
+        self._savers = None
+    
+    def load(self, savers:list[Saver]):
+        
+        self._savers = list(savers)
+        
+        self.x = numpy.array([saver.rect.x for saver in self._savers], dtype=numpy.int64)
+        self.y = numpy.array([saver.rect.y for saver in self._savers], dtype=numpy.int64)
+        
+        self.directionX = numpy.array([saver.directionX for saver in self._savers], dtype=numpy.int64)
+        self.directionY = numpy.array([saver.directionY for saver in self._savers], dtype=numpy.int64)
+        
+        self.speed = numpy.array([saver.speed for saver in self._savers], dtype=numpy.float64)
+        
+        self.width = numpy.array([saver.width for saver in self._savers], dtype=numpy.float64)
+        self.height = numpy.array([saver.height for saver in self._savers], dtype=numpy.float64)
+        
+        self.cornerHitted = numpy.array([saver.cornerHitted for saver in self._savers], dtype=bool)
+        self.lastCornerHitTime = numpy.array([saver.lastCornerHitTime or 0 for saver in self._savers], dtype=numpy.float64)
+    
+    def step(self, time:int) -> tuple:
+        
+        #savers in corner pause don't move, the pause ends on the first tick after CORNERHITPAUSE
+        paused = self.cornerHitted.copy()
+        
+        cornerEnded = paused & (time - self.lastCornerHitTime > CORNERHITPAUSE + CORNERHITPAUSETOLERANCE)
+        
+        self.cornerHitted[cornerEnded] = False
+        
+        moving = ~paused
+        
+        self.x = numpy.where(moving, roundLikeRect(self.x + self.speed * self.directionX), self.x)
+        self.y = numpy.where(moving, roundLikeRect(self.y + self.speed * self.directionY), self.y)
+        
+        rightBorder = self.board.width - self.width + self.board.rect.x
+        leftBorder = self.board.rect.x * 2
+        
+        bottomBorder = self.board.height - self.height + self.board.rect.y
+        topBorder = self.board.rect.y * 2
+        
+        rightHitted = moving & (self.x >= rightBorder)
+        leftHitted = moving & ~rightHitted & (self.x <= leftBorder)
+        
+        bottomHitted = moving & (self.y >= bottomBorder)
+        topHitted = moving & ~bottomHitted & (self.y <= topBorder)
+        
+        xHitted = rightHitted | leftHitted
+        yHitted = bottomHitted | topHitted
+        
+        self.directionX[xHitted] = -self.directionX[xHitted]
+        self.directionY[yHitted] = -self.directionY[yHitted]
+        
+        self.x[rightHitted] = roundLikeRect(rightBorder - 1)[rightHitted]
+        self.x[leftHitted] = leftBorder + 1
+        
+        self.y[bottomHitted] = roundLikeRect(bottomBorder - 1)[bottomHitted]
+        self.y[topHitted] = topBorder + 1
+        
+        cornerHitted = xHitted & yHitted
+        
+        self.cornerHitted |= cornerHitted
+        self.lastCornerHitTime[cornerHitted] = time
+        
+        return (
+            numpy.flatnonzero(xHitted | yHitted),
+            numpy.flatnonzero(cornerHitted),
+            numpy.flatnonzero(cornerEnded)
+        )
+    
+    def update(self, savers:list[Saver]):
+        
+        if self._savers is None:
+            
+            self.load(savers)
+            
+        if not self._savers: return
+        
+        time = self.board._app.getSimulationTime()
+        
+        wallHits, cornerHits, cornerEnds = self.step(time)
+        
+        for saver, x, y in zip(self._savers, self.x.tolist(), self.y.tolist()):
+            
+            saver.rect.topleft = (x, y)
+            
+        for index in wallHits.tolist():
+            
+            saver = self._savers[index]
+            
+            saver.directionX = int(self.directionX[index])
+            saver.directionY = int(self.directionY[index])
+            
+            saver.hitWall()
+            
+        for index in cornerHits.tolist():
+            
+            self._savers[index].cornerHit(time)
+            
+        for index in cornerEnds.tolist():
+            
+            self._savers[index].cornerHitted = False
+
+#routes every event once, to the handlers subscribed to its type, instead of every object scanning all events
+#area handlers get only events at positions inside their rect, found by bisecting the tops of gui column rects
+class EventRouter:
+    
+    #pygame and SDL need window events to keep the window surface right, they are never blocked
+    alwaysAllowed = (
+        pygame.QUIT, pygame.ACTIVEEVENT, pygame.VIDEORESIZE, pygame.VIDEOEXPOSE,
+        pygame.WINDOWSHOWN, pygame.WINDOWHIDDEN, pygame.WINDOWEXPOSED, pygame.WINDOWMOVED,
+        pygame.WINDOWRESIZED, pygame.WINDOWSIZECHANGED, pygame.WINDOWMINIMIZED, pygame.WINDOWMAXIMIZED,
+        pygame.WINDOWRESTORED, pygame.WINDOWENTER, pygame.WINDOWLEAVE, pygame.WINDOWFOCUSGAINED,
+        pygame.WINDOWFOCUSLOST, pygame.WINDOWCLOSE
+    )
+    
+    def __init__(self):
+        
+        self._handlers:dict[int, list] = {}
+        
+        #event type -> (function returning the rect, handler)
+        self._areaHandlers:dict[int, list[tuple]] = {}
+        
+        #event type -> (sorted tops, (rect, handler) in the same order), built again after gui resize
+        self._areaIndex:dict[int, tuple[list[int], list[tuple]]] = {}
+        
+        self._filtering = False
+    
+    def subscribe(self, eventType:int, handler):
+        
+        self._handlers.setdefault(eventType, []).append(handler)
+        
+        if self._filtering: pygame.event.set_allowed(eventType)
+    
+    def subscribeArea(self, eventType:int, getRect, handler):
+        
+        self._areaHandlers.setdefault(eventType, []).append((getRect, handler))
+        
+        self.invalidateAreas()
+        
+        if self._filtering: pygame.event.set_allowed(eventType)
+    
+    def invalidateAreas(self):
+        
+        self._areaIndex = {}
+    
+    def blockUnsubscribedEvents(self):
+        
+        self._filtering = True
+        
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(set(self._handlers) | set(self._areaHandlers) | set(self.alwaysAllowed)))
+    
+    def _getAreaIndex(self, eventType:int) -> tuple[list[int], list[tuple]]:
+        
+        index = self._areaIndex.get(eventType)
+        
+        if index is None:
+            
+            areas = sorted(((getRect(), handler) for getRect, handler in self._areaHandlers[eventType]), key=lambda area: area[0].top)
+            
+            index = self._areaIndex[eventType] = ([rect.top for rect, _ in areas], areas)
+            
+        return index
+    
+    def dispatch(self, events:list[pygame.event.Event]):
+        
+        for event in events:
+            
+            for handler in self._handlers.get(event.type, ()):
+                
+                handler(event)
+                
+            if event.type not in self._areaHandlers: continue
+            
+            tops, areas = self._getAreaIndex(event.type)
+            
+            #gui column rects don't overlap, only the last one starting above the position can contain it
+            index = bisect.bisect_right(tops, event.pos[1]) - 1
+            
+            if index >= 0 and areas[index][0].collidepoint(event.pos): areas[index][1](event)
+
+class CacheStatistics:
+    
+    def __init__(self):
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def getHitRate(self) -> float:
+        
+        total = self.hits + self.misses
+        
+        return self.hits / total if total else 0.0
+
+TEXTCACHESTATISTICS = CacheStatistics()
+
+#times every phase of the frame loop, keeps the last PROFILERFRAMES frames
+class FrameProfiler:
+    
+    def __init__(self, size:int = PROFILERFRAMES):
+        
+        self.frames:collections.deque[dict] = collections.deque(maxlen=size)
+        
+        self._currentFrame:dict = None
+        
+        self._frameStart = 0
+        self._lastMark = 0
+    
+    def startFrame(self):
+        
+        self._frameStart = self._lastMark = time.perf_counter()
+        
+        self._currentFrame = {"start": self._frameStart}
+    
+    def mark(self, phase:str):
+        
+        #time since previous mark is added to the phase
+        if self._currentFrame is None: return
+        
+        now = time.perf_counter()
+        
+        self._currentFrame[phase] = self._currentFrame.get(phase, 0) + (now - self._lastMark) * 1000
+        
+        self._lastMark = now
+    
+    def endFrame(self):
+        
+        if self._currentFrame is None: return
+        
+        self._currentFrame["total"] = (time.perf_counter() - self._frameStart) * 1000
+        
+        self.frames.append(self._currentFrame)
+        
+        self._currentFrame = None
+    
+    def getSummary(self) -> dict:
+        
+        frames = list(self.frames)
+        
+        summary = {"frames": len(frames), "fps": 0.0, "frameMs": getPercentiles([]), "phasesMs": {}}
+        
+        if not frames: return summary
+        
+        elapsed = frames[-1]["start"] - frames[0]["start"]
+        
+        if elapsed > 0: summary["fps"] = (len(frames) - 1) / elapsed
+        
+        summary["frameMs"] = getPercentiles([frame["total"] for frame in frames])
+        
+        phases = dict.fromkeys(phase for frame in frames for phase in frame if phase not in ("start", "total"))
+        
+        for phase in phases:
+            
+            summary["phasesMs"][phase] = getPercentiles([frame.get(phase, 0) for frame in frames])
+            
+        return summary
+
+#counts surfaces created by the app, every place that allocates a surface reports here
+class SurfaceAllocationCounter:
+    
+    def __init__(self):
+        
+        self.total = 0
+        
+        self.currentFrame = 0
+        self.lastFrame = 0
+    
+    def count(self, amount:int = 1):
+        
+        self.total += amount
+        
+        self.currentFrame += amount
+    
+    def nextFrame(self):
+        
+        self.lastFrame = self.currentFrame
+        
+        self.currentFrame = 0
+
+SURFACEALLOCATIONS = SurfaceAllocationCounter()
+
+class ImageCacheEntry:
+    
+    def __init__(self, key:tuple):
+        
+        self.key = key
+        
+        self.value = None
+        
+        self.refCount = 0
+        
+        self.dependencies:list[ImageCacheEntry] = []
+        
+        #future of a loader thread job and main thread function turning its result into the value
+        self.pending:concurrent.futures.Future = None
+        self.finisher = None
+        
+        #called with the value when the entry is evicted, for values holding more than memory
+        self.disposer = None
+    
+    def depend(self, entry:"ImageCacheEntry") -> "ImageCacheEntry":
+        
+        #keeps another entry alive for as long as this one exists
+        self.dependencies.append(entry)
+        
+        return entry
+
+#process-wide cache of decoded and scaled images, shared by every saver with the same source and size
+#entries are reference counted and evicted once the last saver releases them
+class ImageCache:
+    
+    def __init__(self):
+        
+        self._entries:dict[tuple, ImageCacheEntry] = {}
+        
+        self._loadingEntries:list[ImageCacheEntry] = []
+        
+        self._loaderPool:concurrent.futures.ThreadPoolExecutor = None
+        
+        #changes whenever an entry gets its value or is evicted
+        self.revision = 0
+        
+        self.statistics = CacheStatistics()
+    
+    def acquire(self, key:tuple, loader) -> ImageCacheEntry:
+        
+        entry = self._entries.get(key)
+        
+        if entry is None:
+            
+            self.statistics.misses += 1
+            
+            entry = ImageCacheEntry(key)
+            entry.value = loader(entry)
+            
+            self._entries[key] = entry
+            self.revision += 1
+            
+        else:
+            
+            self.statistics.hits += 1
+            
+        entry.refCount += 1
+        
+        return entry
+    
+    def acquireInBackground(self, key:tuple, job, finisher) -> ImageCacheEntry:
+        
+        #value stays None until finishLoading hands the job result to the finisher on the main thread
+        entry = self._entries.get(key)
+        
+        if entry is None:
+            
+            self.statistics.misses += 1
+            
+            entry = ImageCacheEntry(key)
+            entry.pending = self.getLoaderPool().submit(job)
+            entry.finisher = finisher
+            
+            self._entries[key] = entry
+            self._loadingEntries.append(entry)
+            
+        else:
+            
+            self.statistics.hits += 1
+            
+        entry.refCount += 1
+        
+        return entry
+    
+    def getLoaderPool(self) -> concurrent.futures.ThreadPoolExecutor:
+        
+        if self._loaderPool is None:
+            
+            self._loaderPool = concurrent.futures.ThreadPoolExecutor(LOADERTHREADS)
+            
+        return self._loaderPool
+    
+    def finishLoading(self):
+        
+        #never waits, jobs which are not done yet are checked again next frame
+        if not self._loadingEntries: return
+        
+        stillLoading = []
+        
+        for entry in self._loadingEntries:
+            
+            if not entry.pending.done():
+                
+                stillLoading.append(entry)
+                
+                continue
+            
+            result = entry.pending.result()
+            
+            entry.pending = None
+            
+            #entry could be released by all savers while it was loading
+            if self._entries.get(entry.key) is entry:
+                
+                entry.value = entry.finisher(entry, result)
+                self.revision += 1
+                
+        self._loadingEntries = stillLoading
+    
+    def isLoading(self) -> bool:
+        
+        return bool(self._loadingEntries)
+    
+    def release(self, entry:ImageCacheEntry):
+        
+        entry.refCount -= 1
+        
+        if entry.refCount <= 0 and self._entries.get(entry.key) is entry:
+            
+            del self._entries[entry.key]
+            self.revision += 1
+            
+            if entry.disposer and entry.value is not None: entry.disposer(entry.value)
+            
+            for dependency in entry.dependencies:
+                
+                self.release(dependency)
+    
+    def contains(self, key:tuple) -> bool:
+        
+        return key in self._entries
+    
+    def convertToDisplayFormat(self):
+        
+        for entry in self._entries.values():
+            
+            if isinstance(entry.value, list):
+                
+                entry.value = [convertToDisplayFormat(surface) for surface in entry.value]
+                
+            elif isinstance(entry.value, pygame.Surface):
+                
+                entry.value = convertToDisplayFormat(entry.value)
+                
+        self.revision += 1
+    
+    def getEntries(self) -> list[ImageCacheEntry]:
+        
+        return list(self._entries.values())
+    
+    def __len__(self) -> int:
+        
+        return len(self._entries)
+
+IMAGECACHE = ImageCache()
+
+#scaled images and frames of every saver copied into a few big surfaces, cache entries get subsurfaces of them
+#so blits read neighbouring memory instead of many small allocations, rebuilt when cache entries change (spawn, resize)
+#images with per pixel alpha go to their own atlas, so opaque images keep the faster opaque blit
+class SpriteAtlas:
+    
+    #source images and streamed frames are never drawn directly, so they are left out
+    kinds = ("image", "fadeimage", "frames", "fadeframes")
+    
+    def __init__(self, size:int, enabled:bool):
+        
+        self.size = size
+        
+        self.enabled = enabled
+        
+        self.surfaces:list[pygame.Surface] = []
+        
+        self._revision = None
+    
+    def update(self):
+        
+        if not self.enabled or self._revision == IMAGECACHE.revision: return
+        
+        self.rebuild()
+    
+    def pack(self, sizes:list[tuple[int, int]]) -> tuple[list[tuple[int, int, int]], list[tuple[int, int]]]:
+        
+        #shelf packing, sizes must be sorted by height, tallest first
+        #returns (atlas index, x, y) of every size and size of every atlas
+        positions = []
+        atlasSizes = []
+        
+        x = y = shelfHeight = atlasWidth = 0
+        
+        for width, height in sizes:
+            
+            if x + width > self.size:
+                
+                y += shelfHeight
+                x = shelfHeight = 0
+                
+            if y + height > self.size:
+                
+                atlasSizes.append((atlasWidth, y))
+                x = y = shelfHeight = atlasWidth = 0
+                
+            positions.append((len(atlasSizes), x, y))
+            
+            x += width
+            shelfHeight = max(shelfHeight, height)
+            atlasWidth = max(atlasWidth, x)
+            
+        if positions: atlasSizes.append((atlasWidth, y + shelfHeight))
+        
+        return (positions, atlasSizes)
+    
+    def rebuild(self):
+        
+        #sprite is (surface, entry, index of the frame or None for single images)
+        sprites = []
+        
+        for entry in IMAGECACHE.getEntries():
+            
+            if entry.key[0] not in self.kinds or entry.value is None: continue
+            
+            if isinstance(entry.value, list):
+                
+                sprites += [(frame, entry, index) for index, frame in enumerate(entry.value)]
+                
+            else:
+                
+                sprites.append((entry.value, entry, None))
+        
+        sprites = [sprite for sprite in sprites if sprite[0].get_width() <= self.size and sprite[0].get_height() <= self.size]
+        
+        self.surfaces = []
+        
+        replacedFrames:dict[ImageCacheEntry, list[pygame.Surface]] = {}
+        
+        for hasAlpha in (False, True):
+            
+            group = [sprite for sprite in sprites if bool(sprite[0].get_flags() & pygame.SRCALPHA) == hasAlpha]
+            group.sort(key=lambda sprite: sprite[0].get_height(), reverse=True)
+            
+            positions, atlasSizes = self.pack([sprite[0].get_size() for sprite in group])
+            
+            atlases = []
+            
+            for atlasSize in atlasSizes:
+                
+                SURFACEALLOCATIONS.count()
+                
+                atlas = pygame.Surface(atlasSize, pygame.SRCALPHA) if hasAlpha else pygame.Surface(atlasSize)
+                atlas.fill((0, 0, 0, 0))
+                
+                atlases.append(atlas)
+                
+            for (surface, entry, index), (atlasIndex, x, y) in zip(group, positions):
+                
+                #fading images keep their alpha, but pixels are copied without it
+                alpha = surface.get_alpha()
+                
+                if not hasAlpha: surface.set_alpha(None)
+                
+                atlases[atlasIndex].blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_ADD if hasAlpha else 0)
+                
+                SURFACEALLOCATIONS.count()
+                
+                sprite = atlases[atlasIndex].subsurface((x, y, *surface.get_size()))
+                sprite.set_alpha(alpha)
+                
+                if index is None:
+                    
+                    entry.value = sprite
+                    
+                else:
+                    
+                    #frames of one entry can end up in both groups, lists are swapped once all are copied
+                    replacedFrames.setdefault(entry, list(entry.value))[index] = sprite
+                    
+            self.surfaces += atlases
+        
+        for entry, frames in replacedFrames.items():
+            
+            entry.value = frames
+            
+        self._revision = IMAGECACHE.revision
+
+SPRITEATLAS = SpriteAtlas(ATLASSIZE, ATLASPACKING)
+
+#frame counter of animations, advanced at the end of every app frame
+#all savers showing the same animation at the same phase blit the same cached frame
+#images which aren't drawn every frame, like cornerhit overlays and wallhit overlays without resetAnimation,
+#skip the frames they missed instead of continuing from the last one they showed
+class AnimationClock:
+    
+    def __init__(self):
+        
+        self.tick = 0
+    
+    def advance(self):
+        
+        self.tick += 1
+
+ANIMATIONCLOCK = AnimationClock()
+
+#raw pixels of scaled images stored in DISKCACHEDIRECTORY, keyed by hash of the source file and target size
+#files are memory mapped on load, so surfaces use page cache directly instead of decoding the image again
+#changed source file has a different hash, which invalidates its old entries
+class DiskPixelCache:
+    
+    def __init__(self, directory:str, enabled:bool):
+        
+        self.directory = directory
+        
+        self.enabled = enabled
+        
+        #path -> (modification time, size, hash), so unchanged files are hashed once per run
+        self._fileHashes:dict[str, tuple[int, int, str]] = {}
+        
+        self.statistics = CacheStatistics()
+    
+    def getFileHash(self, file:str) -> str:
+        
+        fileStat = os.stat(file)
+        
+        known = self._fileHashes.get(file)
+        
+        if known and known[0] == fileStat.st_mtime_ns and known[1] == fileStat.st_size: return known[2]
+        
+        with open(file, "rb") as sourceFile:
+            
+            fileHash = hashlib.sha1(sourceFile.read()).hexdigest()
+            
+        self._fileHashes[file] = (fileStat.st_mtime_ns, fileStat.st_size, fileHash)
+        
+        return fileHash
+    
+    def _getPath(self, file:str, size:tuple[int, int], kind:str) -> str:
+        
+        return os.path.join(self.directory, f"{self.getFileHash(file)}_{size[0]}x{size[1]}_{kind}")
+    
+    def _read(self, path:str) -> tuple:
+        
+        #damaged or truncated files and pixels of another write than the metadata are misses like missing files
+        try:
+            
+            with open(f"{path}.json") as metaFile:
+                
+                meta = json.load(metaFile)
+                
+            mode = meta["mode"]
+            frameSize = (meta["size"][0], meta["size"][1])
+            frameCount = meta["frames"]
+            
+            frameLength = frameSize[0] * frameSize[1] * len(mode)
+            
+            with open(f"{path}.raw", "rb") as pixelFile:
+                
+                #copy on write mapping, pages are only read when surfaces are blitted
+                pixels = memoryview(mmap.mmap(pixelFile.fileno(), 0, access=mmap.ACCESS_COPY))
+                
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            
+            return None
+        
+        if mode not in ("RGB", "RGBA") or frameCount < 1 or len(pixels) != frameCount * frameLength: return None
+        
+        return (mode, frameSize, frameCount, frameLength, pixels)
+    
+    def load(self, file:str, size:tuple[int, int], kind:str) -> list[pygame.Surface]:
+        
+        stored = self._read(self._getPath(file, size, kind))
+        
+        if stored is None:
+            
+            self.statistics.misses += 1
+            
+            return None
+        
+        mode, frameSize, frameCount, frameLength, pixels = stored
+        
+        self.statistics.hits += 1
+        
+        SURFACEALLOCATIONS.count(frameCount)
+        
+        return [pygame.image.frombuffer(pixels[index * frameLength:(index + 1) * frameLength], frameSize, mode) for index in range(frameCount)]
+    
+    def _writeFile(self, path:str, fileMode:str, write):
+        
+        #temporary file gets a unique name, processes sharing the cache never move each other's half written files into place
+        descriptor, temporaryPath = tempfile.mkstemp(suffix=".tmp", prefix=os.path.basename(path), dir=self.directory)
+        
+        try:
+            
+            with os.fdopen(descriptor, fileMode) as outputFile:
+                
+                write(outputFile)
+                
+            os.replace(temporaryPath, path)
+            
+        except OSError:
+            
+            if os.path.exists(temporaryPath): os.remove(temporaryPath)
+            
+            raise
+    
+    def store(self, file:str, size:tuple[int, int], kind:str, surfaces:list[pygame.Surface]) -> list[pygame.Surface]:
+        
+        #returns surfaces back so loaders can store and return in one expression
+        if not self.enabled or not surfaces: return surfaces
+        
+        mode = "RGBA" if surfaces[0].get_flags() & pygame.SRCALPHA else "RGB"
+        
+        path = self._getPath(file, size, kind)
+        
+        try:
+            
+            os.makedirs(self.directory, exist_ok=True)
+            
+            #pixels first and metadata last, so readers never see metadata of incomplete pixels
+            def writePixels(pixelFile):
+                
+                for surface in surfaces:
+                    
+                    pixelFile.write(pygame.image.tobytes(surface, mode))
+            
+            self._writeFile(f"{path}.raw", "wb", writePixels)
+            
+            self._writeFile(f"{path}.json", "w", lambda metaFile: json.dump({"mode": mode, "size": surfaces[0].get_size(), "frames": len(surfaces)}, metaFile))
+            
+        except OSError as error:
+            
+            print(f"Could not write disk cache for \"{file}\": {error}")
+        
+        return surfaces
+
+DISKPIXELCACHE = DiskPixelCache(DISKCACHEDIRECTORY, DISKCACHE)
+
+#least recently used frames of streamed animations, frames are evicted once their total size is over the budget
+class FrameCache:
+    
+    def __init__(self, budget:int):
+        
+        self.budget = budget
+        
+        self.size = 0
+        
+        self._frames:collections.OrderedDict[tuple, pygame.Surface] = collections.OrderedDict()
+        
+        self.statistics = CacheStatistics()
+    
+    def get(self, key:tuple) -> pygame.Surface:
+        
+        frame = self._frames.get(key)
+        
+        if frame is None:
+            
+            self.statistics.misses += 1
+            
+            return None
+        
+        self.statistics.hits += 1
+        
+        self._frames.move_to_end(key)
+        
+        return frame
+    
+    def contains(self, key:tuple) -> bool:
+        
+        return key in self._frames
+    
+    def put(self, key:tuple, frame:pygame.Surface):
+        
+        self.discard(key)
+        
+        self._frames[key] = frame
+        self.size += getSurfaceBytes(frame)
+        
+        #newest frame stays even if it is bigger than the whole budget, it is about to be shown
+        while self.size > self.budget and len(self._frames) > 1:
+            
+            _, evicted = self._frames.popitem(last=False)
+            
+            self.size -= getSurfaceBytes(evicted)
+    
+    def discard(self, key:tuple):
+        
+        frame = self._frames.pop(key, None)
+        
+        if frame is not None: self.size -= getSurfaceBytes(frame)
+    
+    def clear(self):
+        
+        self._frames.clear()
         
-        self.animationReset = context["resetAnimation"]
+        self.size = 0
+
+FRAMECACHE = FrameCache(FRAMECACHEBUDGET * 1024 * 1024)
+
+#resource name -> frame cache of resources with their own budget
+FRAMECACHES:dict[str, FrameCache] = {}
+
+#frames of one gif at one size, decoded when they are requested and kept only while the frame cache keeps them
+#next frames are decoded ahead in loader threads, so playback rarely waits for the decoder
+class AnimationStream:
+    
+    def __init__(self, key:tuple, file:str, size:tuple[int, int], frameCache:FrameCache):
         
-        self.wallHitEnabled = context["wallhitenabled"]
+        self.key = key
         
-        self.cornerHitEnabled = context["cornerhitenabled"]
+        self.file = file
+        self.size = size
         
-        self._sourceFiles["idle"] = generatePathToImageResource(self.resourcesName, context["idle"])
+        self.frameCache = frameCache
         
-        if self.wallHitEnabled:
-            
-            self._sourceFiles["wallhit"] = generatePathToImageResource(self.resourcesName, context["wallhit"])
+        #PIL image is not thread safe, loader threads and the main thread take turns decoding
+        self._lock = threading.Lock()
+        
+        self._source = Image.open(file)
+        self._closed = False
+        
+        #first frame is skipped like in loadAnimationFrames
+        self.frameCount = self._source.n_frames - 1
+        
+        self._readAhead:concurrent.futures.Future = None
+        self._readAheadIndices:tuple[int, ...] = ()
+    
+    def _decodeFrames(self, indices:tuple[int, ...]) -> list[tuple[int, tuple]]:
+        
+        decoded = []
+        
+        with self._lock:
             
-        if self.cornerHitEnabled:
+            if self._closed: return decoded
             
-            self._sourceFiles["cornerhit"] = generatePathToImageResource(self.resourcesName, context["cornerhit"])
+            for index in indices:
+                
+                self._source.seek(index + 1)
+                
+                decoded.append((index, decodePillowImage(self._source.convert("RGB"))))
+                
+        return decoded
+    
+    def _storeFrames(self, decoded:list[tuple[int, tuple]]) -> list[pygame.Surface]:
         
-        self.createImages()
-
-class ResourceManager:
+        #scaled here like preloaded frames, so streaming doesn't change the pixels of an animation
+        frames = []
+        
+        for index, pixels in decoded:
+            
+            frame = resizeImage(surfaceFromDecoded(pixels).convert(), *self.size)
+            
+            self.frameCache.put((self.key, index), frame)
+            
+            frames.append(frame)
+            
+        return frames
     
-    def __init__(self):
+    def _collectReadAhead(self, wait:bool = False):
         
-        self.mainDirectory = RESOURCESDIRECTORY
+        if self._readAhead is None or not (wait or self._readAhead.done()): return
         
-        self._resources:list[dict] = []
+        decoded = self._readAhead.result()
+        
+        self._readAhead = None
+        self._readAheadIndices = ()
+        
+        self._storeFrames(decoded)
     
-    def getRandomResource(self) -> dict:
+    def _scheduleReadAhead(self, index:int):
         
-        return random.choice(self._resources)
+        if self._readAhead is not None: return
+        
+        upcoming = dict.fromkeys((index + offset) % self.frameCount for offset in range(1, STREAMREADAHEAD + 1))
+        
+        indices = tuple(frameIndex for frameIndex in upcoming if not self.frameCache.contains((self.key, frameIndex)))
+        
+        if not indices: return
+        
+        self._readAheadIndices = indices
+        self._readAhead = IMAGECACHE.getLoaderPool().submit(self._decodeFrames, indices)
     
-    def getAllResources(self) -> list[dict]:
+    def getFrame(self, index:int) -> pygame.Surface:
         
-        return self._resources
+        #frame which is being decoded ahead is waited for instead of being decoded twice
+        self._collectReadAhead(index in self._readAheadIndices)
+        
+        frame = self.frameCache.get((self.key, index))
+        
+        if frame is None:
+            
+            frame = self._storeFrames(self._decodeFrames((index,)))[0]
+            
+        self._scheduleReadAhead(index)
+        
+        return frame
     
-    def getResourceByName(self, name) -> dict:
+    def close(self):
         
-        for resource in self._resources:
+        #waits for a running read ahead, its frames are thrown away
+        with self._lock:
             
-            if resource["resourceName"] == name:
-                
-                return resource
+            self._closed = True
             
-        return None
+            self._source.close()
+            
+        for index in range(self.frameCount):
+            
+            self.frameCache.discard((self.key, index))
+
+#decoded images at their original size are cached as well, scaled images depend on them
+#so resizing rescales from memory instead of reading and decoding the files again
+def acquireSourceImage(file:str) -> ImageCacheEntry:
+    
+    return IMAGECACHE.acquire(("source", file), lambda entry: convertToDisplayFormat(loadImage(file)))
+
+def acquireSourceFrames(file:str) -> ImageCacheEntry:
+    
+    return IMAGECACHE.acquire(("sourceframes", file), lambda entry: loadAnimationFrames(file))
+
+def acquireScaledImage(file:str, width:float, height:float, fading:bool = False, background:bool = False) -> ImageCacheEntry:
+    
+    key = ("fadeimage" if fading else "image", file, int(width), int(height))
+    size = (int(width), int(height))
     
-    def loadResourcesFromMainDirectory(self):
+    if DISKPIXELCACHE.enabled and not IMAGECACHE.contains(key):
         
-        for file in os.listdir(self.mainDirectory):
+        stored = DISKPIXELCACHE.load(file, size, "image")
+        
+        #converting copies the mapped pixels, but that still skips decoding and scaling
+        if stored: return IMAGECACHE.acquire(key, lambda entry: convertToDisplayFormat(stored[0]))
+    
+    #once the source is decoded only scaling is left, which is cheap enough for the main thread
+    #still image of an animation is its first frame as pygame loads it, loader threads decode the other frames
+    if background and not isResourceIsAnimation(file) and not IMAGECACHE.contains(("source", file)):
+        
+        #scaled like the synchronous path below, pixels of one key must not depend on which path loaded them
+        def finish(entry:ImageCacheEntry, source) -> pygame.Surface:
             
-            directory = os.path.join(self.mainDirectory, file)
+            sourceEntry = entry.depend(registerDecodedSource(file, source))
             
-            if os.path.isdir(directory):
-                
-                self.loadResourceFromDirectory(directory)
-                
-    def loadResourceFromDirectory(self, directory:str):
+            return DISKPIXELCACHE.store(file, size, "image", [resizeImage(sourceEntry.value, width, height)])[0]
         
-        resourceDirectory = directory.replace(f"{self.mainDirectory}\\", "")
+        return IMAGECACHE.acquireInBackground(key, lambda: decodeSourceFile(file), finish)
+    
+    return IMAGECACHE.acquire(
+        key,
+        lambda entry: DISKPIXELCACHE.store(file, size, "image", [resizeImage(entry.depend(acquireSourceImage(file)).value, width, height)])[0]
+    )
+
+def acquireScaledFrames(file:str, width:float, height:float, fading:bool = False, background:bool = False) -> ImageCacheEntry:
+    
+    key = ("fadeframes" if fading else "frames", file, int(width), int(height))
+    size = (int(width), int(height))
+    
+    if DISKPIXELCACHE.enabled and not IMAGECACHE.contains(key):
         
-        print(f"Loading resource: \"{resourceDirectory}\"")
+        stored = DISKPIXELCACHE.load(file, size, "frames")
         
-        contextPath = f"{directory}\\context.json"
+        if stored: return IMAGECACHE.acquire(key, lambda entry: [convertToDisplayFormat(frame) for frame in stored])
+    
+    if background and not IMAGECACHE.contains(("sourceframes", file)):
         
-        #check if context exist
-        if not os.path.exists(contextPath):
+        def finish(entry:ImageCacheEntry, sourceFrames) -> list[pygame.Surface]:
             
-            print(f"Resource \"{resourceDirectory}\" has no context, skipping")
-            return
+            sourceEntry = entry.depend(registerDecodedSource(file, sourceFrames))
+            
+            return DISKPIXELCACHE.store(file, size, "frames", [resizeImage(frame, width, height) for frame in sourceEntry.value])
         
-        #create context
-        context = {}
+        return IMAGECACHE.acquireInBackground(key, lambda: decodeSourceFile(file), finish)
+    
+    return IMAGECACHE.acquire(
+        key,
+        lambda entry: DISKPIXELCACHE.store(file, size, "frames", [resizeImage(frame, width, height) for frame in entry.depend(acquireSourceFrames(file)).value])
+    )
+
+def acquireSaverResourceHandle(context:dict, width:float, height:float, background:bool = False) -> SaverResourceHandle:
+    
+    key = (context["resourceName"], int(width), int(height))
+    
+    handle = SAVERRESOURCEHANDLES.get(key)
+    
+    if handle is None:
         
-        with open(contextPath) as contextFile:
+        handle = SAVERRESOURCEHANDLES[key] = SaverResourceHandle(key, context, width, height, background)
+        
+    handle.refCount += 1
+    
+    return handle
+
+def acquireAnimationStream(file:str, width:float, height:float, frameCache:FrameCache, fading:bool = False) -> ImageCacheEntry:
+    
+    #streamed frames never go to the disk cache, keeping every frame on disk is what streaming avoids
+    key = ("fadeframestream" if fading else "framestream", file, int(width), int(height))
+    
+    def load(entry:ImageCacheEntry) -> AnimationStream:
+        
+        entry.disposer = AnimationStream.close
+        
+        return AnimationStream(key, file, (int(width), int(height)), frameCache)
+    
+    return IMAGECACHE.acquire(key, load)
+
+#solid surfaces shown instead of images which are still loading, one per size
+PLACEHOLDERS:dict[tuple[int, int], pygame.Surface] = {}
+
+def getPlaceholder(size:tuple[int, int]) -> pygame.Surface:
+    
+    placeholder = PLACEHOLDERS.get(size)
+    
+    if placeholder is None:
+        
+        placeholder = PLACEHOLDERS[size] = createSurface(size)
+        placeholder.fill(LOADINGCOLOR)
+        
+    return placeholder
+
+#alpha of the wallhit overlay for every frame after a hit, shared by all savers with the same fade speed
+FADETABLES:dict[int, tuple[int, ...]] = {}
+
+def getFadeTable(alphaSpeed:int) -> tuple[int, ...]:
+    
+    table = FADETABLES.get(alphaSpeed)
+    
+    if table is None:
+        
+        alphas = []
+        
+        alpha = FADESTARTALPHA
+        
+        while alpha > 0:
             
-            rawContextData = json.load(contextFile)
+            alphas.append(min(alpha, 255))
             
-            try:
-               
-                resourceName = rawContextData["resourceName"]
-                if resourceName == "$asDirectory": #marker for fast naming
-                    
-                    context["resourceName"] = resourceDirectory
-                    
-                else:
-                    
-                    context["resourceName"] = resourceName
-                   
-                resourceIdleImage = rawContextData["idle"]
-                if not os.path.exists(f"{directory}\\{resourceIdleImage}"):
-                    print(f"Resource \"{resourceDirectory}\" has no idle image, which is required, skipping")
-                    return
-
-                context["idle"] = resourceIdleImage
-                
-                resourceWallHitImage = rawContextData["wallhit"]
-                if not os.path.exists(f"{directory}\\{resourceWallHitImage}"):
-                    
-                    print(f"Resource \"{resourceDirectory}\" has no wallhit image, which is optional")
-                    
-                    context["wallhitenabled"] = False
-                    
-                else:
-                    
-                    context["wallhitenabled"] = True
-                    
-                    context["wallhit"] = resourceWallHitImage
-                    
-                resourceCornerHitImage = rawContextData["cornerhit"]
-                if not os.path.exists(f"{directory}\\{resourceCornerHitImage}"):
-                    
-                    print(f"Resource \"{resourceDirectory}\" has no cornerhit image, which is optional")
-                    
-                    context["cornerhitenabled"] = False
-                    
-                else:
-                    
-                    context["cornerhitenabled"] = True
-                    
-                    context["cornerhit"] = resourceCornerHitImage
-                
-                animationReset = False
-                
-                try:
-                    
-                    animationReset = rawContextData["resetAnimation"]
-                    
-                except KeyError:
-                    
-                    print(f"Resource \"{resourceDirectory}\" has no attribute \"animationReset\", automatically set to false")
-                    
-                context["resetAnimation"] = animationReset
-                
-            except KeyError: 
-                
-                print(f"Resource \"{resourceDirectory}\" context is missing required info, check help.txt")
-                return
+            #without speed overlay never fades, which is the only entry of the table
+            if alphaSpeed <= 0: break
+            
+            alpha -= alphaSpeed
+            
+        table = FADETABLES[alphaSpeed] = tuple(alphas)
         
-        self._resources.append(context)
+    return table
+
+def getPercentiles(values:list[float]) -> dict:
+    
+    ordered = sorted(values)
+    
+    if not ordered: return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    
+    def percentile(fraction:float) -> float:
         
-        print(f"Resource: \"{resourceDirectory}\" was added successfully!")
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+    
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(0.5),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": ordered[-1]
+    }
 
 def isResourceIsAnimation(resource) -> bool:
     
@@ -933,18 +3486,199 @@ def isResourceIsAnimation(resource) -> bool:
          
 def generatePathToImageResource(resourceName, image) -> str:
     
-    return f"{RESOURCESDIRECTORY}\\{resourceName}\\{image}"   
+    return os.path.join(RESOURCESDIRECTORY, resourceName, image)
  
 def getCurrentSaversSize(board) -> tuple[float, float]:
     
     return (board.width * IMAGERATIO, board.height * IMAGERATIO)
 
+def roundLikeRect(values):
+    
+    #pygame.Rect rounds float coordinates half away from zero
+    whole = numpy.trunc(values)
+    
+    return (whole + numpy.sign(values) * (numpy.abs(values - whole) >= 0.5)).astype(numpy.int64)
+
+def isCornerPauseOver(elapsed:float) -> bool:
+    
+    return elapsed > CORNERHITPAUSE + CORNERHITPAUSETOLERANCE
+
+def roundCoordinate(value:float) -> int:
+    
+    #same rounding as assigning a float to a pygame.Rect coordinate, half away from zero like roundLikeRect
+    #the pygame.Rect constructor truncates instead, so it can't be used for this
+    whole = math.trunc(value)
+    
+    if abs(value - whole) < 0.5: return whole
+    
+    return whole + 1 if value > 0 else whole - 1
+
+def loadAnimationFrames(file:str) -> list[pygame.Surface]:
+    
+    frames = []
+    
+    with Image.open(file) as source:
+        
+        for index in range(1, source.n_frames):
+            
+            source.seek(index)
+            
+            SURFACEALLOCATIONS.count(2)
+            
+            frames.append(pygame.image.fromstring(source.tobytes(), source.size, source.mode).convert())
+            
+    return frames
+
+#decoding for loader threads, only PIL is used there and results are raw pixel buffers
+#which the main thread wraps into surfaces
+def decodePillowImage(image:Image.Image) -> tuple[str, tuple[int, int], bytes]:
+    
+    hasAlpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+    
+    mode = "RGBA" if hasAlpha else "RGB"
+    
+    return (mode, image.size, image.convert(mode).tobytes())
+
+def decodeSourceFile(file:str):
+    
+    #runs in startup worker processes and loader threads, arguments and results must be picklable
+    with Image.open(file) as source:
+        
+        if isResourceIsAnimation(file):
+            
+            frames = []
+            
+            for index in range(1, source.n_frames):
+                
+                source.seek(index)
+                
+                frames.append(decodePillowImage(source.convert("RGB")))
+                
+            return frames
+        
+        source.load()
+        
+        return decodePillowImage(source)
+
+def registerDecodedSource(file:str, decoded) -> ImageCacheEntry:
+    
+    if isResourceIsAnimation(file):
+        
+        return IMAGECACHE.acquire(("sourceframes", file), lambda entry: [surfaceFromDecoded(frame).convert() for frame in decoded])
+    
+    return IMAGECACHE.acquire(("source", file), lambda entry: convertToDisplayFormat(surfaceFromDecoded(decoded)))
+
+def printStartupProgress(done:int, total:int, description:str):
+    
+    print(f"[{done}/{total}] {description}")
+
+def surfaceFromDecoded(decoded:tuple[str, tuple[int, int], bytes]) -> pygame.Surface:
+    
+    mode, size, pixels = decoded
+    
+    SURFACEALLOCATIONS.count()
+    
+    return pygame.image.frombuffer(pixels, size, mode)
+
+def getSurfaceBytes(surface:pygame.Surface) -> int:
+    
+    return surface.get_pitch() * surface.get_height()
+
+def getDisplayFormat() -> tuple:
+    
+    display = pygame.display.get_surface()
+    
+    return (display.get_bitsize(), display.get_masks()) if display else None
+
+def convertToDisplayFormat(surface:pygame.Surface) -> pygame.Surface:
+    
+    if not CONVERTIMAGES or pygame.display.get_surface() is None: return surface
+    
+    SURFACEALLOCATIONS.count()
+    
+    #alpha of fading images is kept, per pixel alpha needs convert_alpha to survive
+    converted = surface.convert_alpha() if surface.get_flags() & pygame.SRCALPHA else surface.convert()
+    converted.set_alpha(surface.get_alpha())
+    
+    return converted
+
+def loadImage(file:str) -> pygame.Surface:
+    
+    SURFACEALLOCATIONS.count()
+    
+    return pygame.image.load(file)
+
+def createSurface(size:tuple[float, float]) -> pygame.Surface:
+    
+    SURFACEALLOCATIONS.count()
+    
+    return pygame.Surface(size)
+
 def resizeImage(image:pygame.Surface, width:int, height:int) -> pygame.Surface:
     
+    SURFACEALLOCATIONS.count()
+    
     return pygame.transform.scale(image, (width, height))
 
+def scaleToSurface(image:pygame.Surface, destination:pygame.Surface):
+    
+    #scales into an existing surface, smooth scaling only works with 24 and 32 bit surfaces
+    if RENDERSCALESMOOTH and image.get_bitsize() >= 24 and destination.get_bitsize() >= 24:
+        
+        pygame.transform.smoothscale(image, destination.get_size(), destination)
+        
+    else:
+        
+        pygame.transform.scale(image, destination.get_size(), destination)
+
+def parseArguments():
+    
+    parser = argparse.ArgumentParser(description=TITLE)
+    
+    parser.add_argument("--count", type=int, default=0, help="savers spawned at start instead of the default one")
+    parser.add_argument("--resource", nargs="+", help="resource names of spawned savers, taken in turn, all resources by default")
+    parser.add_argument("--speed", type=int, help="speed of savers, also shown in the speed field")
+    parser.add_argument("--fps", type=int, default=FPS, help="frames per second, 0 runs unthrottled")
+    parser.add_argument("--seed", type=int, help="random seed, the same seed and options give the same scene")
+    parser.add_argument("--headless", action="store_true", help="run without a window")
+    parser.add_argument("--frames", type=int, help="quit after this many frames")
+    parser.add_argument("--profile", default=PROFILEFILE, help="write profiler data to this json file on exit")
+    
+    return parser.parse_args()
+
 if __name__ == "__main__":
     
+    arguments = parseArguments()
+    
+    if arguments.seed is not None: random.seed(arguments.seed)
+    
+    if arguments.headless:
+        
+        #display is initialized on import, it's started again with the driver which has no window
+        pygame.display.quit()
+        
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        
+        pygame.display.init()
+    
     app = App()
     
-    app.idle()
\ No newline at end of file
+    app.fps = arguments.fps
+    app.profileFile = arguments.profile
+    
+    if arguments.speed is not None: app.speedInput.text = str(arguments.speed)
+    
+    if arguments.count > 0:
+        
+        resourceNames = arguments.resource or [resource["resourceName"] for resource in app.resourceManager.getAllResources()]
+        
+        contexts = [app.resourceManager.getResourceByName(name) for name in resourceNames]
+        
+        for name, context in zip(resourceNames, contexts):
+            
+            if context is None: sys.exit(f"Resource \"{name}\" not found")
+        
+        app.board.clearSavers()
+        app.board.spawnSavers(contexts, arguments.count)
+    
+    app.idle(arguments.frames)
\ No newline at end of file
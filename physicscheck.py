@@ -0,0 +1,151 @@
+import os
+import sys
+import random
+import argparse
+
+#check runs without a window, so the dummy driver must be set before pygame is initialized in main
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+BASEDIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+os.chdir(BASEDIRECTORY)
+
+import pygame
+
+import main
+
+
+DEFAULTCASES = 300
+DEFAULTSEED = 1
+DEFAULTMAXTICKS = 3000
+
+RESOURCE = "jesse" # static images, the check is about motion only
+
+TICKLENGTHS = (1000 / 30, 1000 / 60, 16, 10, 7)
+
+WALLCLOCKTOLERANCE = 100 # ms the wall clock may move on while a case is checked
+
+
+def getState(saver) -> tuple:
+
+    return (tuple(saver.rect), saver.directionX, saver.directionY, saver.cornerHitted, saver.lastCornerHitTime, saver.wallHitted)
+
+def setState(saver, state:tuple):
+
+    rect, saver.directionX, saver.directionY, saver.cornerHitted, saver.lastCornerHitTime, saver.wallHitted = state
+
+    saver.rect = pygame.Rect(rect)
+
+def checkCase(app, context) -> str:
+
+    #window sizes with fractional board size and offset, like most sizes the window can be resized to
+    app.resize(random.randint(300, 1600), random.randint(200, 1200))
+
+    app.board.clearSavers()
+
+    saver = app.board.generateSaver(context)
+    saver.speed = random.randint(1, 40)
+
+    tickMs = random.choice(TICKLENGTHS)
+    ticks = random.randint(1, DEFAULTMAXTICKS)
+    time = random.randint(0, 10000)
+
+    #some savers start in the middle of a corner pause
+    if random.random() < 0.2:
+
+        saver.cornerHitted = True
+        saver.lastCornerHitTime = time - random.randint(0, main.CORNERHITPAUSE)
+
+    start = getState(saver)
+
+    predictedCorner = saver.predictCornerHit(tickMs, time)
+
+    firstCorner = None
+
+    for tick in range(1, ticks + 1):
+
+        wasCornerHitted = saver.cornerHitted
+
+        saver.update(time + tick * tickMs)
+
+        if firstCorner is None and saver.cornerHitted and not wasCornerHitted: firstCorner = tick
+
+    stepped = getState(saver)
+
+    setState(saver, start)
+
+    saver.fastForward(ticks, tickMs, time)
+
+    forwarded = getState(saver)
+
+    description = f"window {app.width}x{app.height}, speed {saver.speed}, tick {tickMs:.2f} ms, {ticks} ticks"
+
+    if stepped != forwarded:
+
+        return f"{description}: fastForward ended in {forwarded}, stepping in {stepped}"
+
+    if firstCorner is not None and predictedCorner != firstCorner:
+
+        return f"{description}: predicted corner hit at tick {predictedCorner}, stepping hit it at {firstCorner}"
+
+    if firstCorner is None and predictedCorner is not None and predictedCorner <= ticks:
+
+        return f"{description}: predicted corner hit at tick {predictedCorner}, stepping hit none"
+
+    if predictedCorner is not None and not app.fixedTimestep:
+
+        #skipping to the corner hit on the wall clock, the pause has to start now and not after the skipped time
+        setState(saver, start)
+        saver.cornerHitted = False
+
+        app.board.fastForward(saver.predictCornerHit(tickMs), tickMs)
+
+        remainingPause = saver.lastCornerHitTime + main.CORNERHITPAUSE - app.getTime()
+
+        if not saver.cornerHitted or remainingPause > main.CORNERHITPAUSE + WALLCLOCKTOLERANCE:
+
+            return f"{description}: skipping to the corner hit on the wall clock left a pause of {remainingPause:.0f} ms"
+
+    return None
+
+def parseArguments():
+
+    parser = argparse.ArgumentParser(description="Checks that Saver.fastForward and Saver.predictCornerHit agree with stepping Saver.update")
+
+    parser.add_argument("--cases", type=int, default=DEFAULTCASES, help="random window sizes, speeds and tick lengths to check")
+    parser.add_argument("--seed", type=int, default=DEFAULTSEED, help="random seed of the cases")
+
+    return parser.parse_args()
+
+def runCheck():
+
+    arguments = parseArguments()
+
+    random.seed(arguments.seed)
+
+    main.ASYNCLOADING = False
+
+    app = main.App()
+
+    context = app.resourceManager.getResourceByName(RESOURCE)
+
+    failures = []
+
+    for _ in range(arguments.cases):
+
+        failure = checkCase(app, context)
+
+        if failure: failures.append(failure)
+
+    for failure in failures:
+
+        print(failure, file=sys.stderr)
+
+    print(f"{arguments.cases - len(failures)} of {arguments.cases} cases match stepping")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+
+    runCheck()